@@ -2,34 +2,99 @@
 #
 
 # Imports
+from collections import deque
 from dataclasses import dataclass
 import arcade
 import random
 import arcade.gui as gui
 import database as db
+import resources
+import physics
+import hud
+import levels
+import spawns
+import replay
+from profiler import PROFILER
+from startup import STARTUP
+import math
 import os
 import sys
+import time
 
 from pyglet.image import load as pyglet_load
 # Constants
 
-DATABASE = db.DataBase()
+# Directory keeping a replay of every finished run, off when unset
+REPLAY_DIR = os.environ.get("SUPERMAN_REPLAYS")
 # Classes
 
+# PyInstaller unpacks a frozen build into a temp folder named by _MEIPASS
+BASE_PATH = getattr(sys, "_MEIPASS", os.path.abspath("."))
+
 def resource_path(relative_path):
-  try:
-  # PyInstaller creates a temp folder and stores path in _MEIPASS
-      base_path = sys._MEIPASS
-  except Exception:
-      base_path = os.path.abspath(".")
+  return os.path.join(BASE_PATH, relative_path)
+
+# Level definitions, validated and compiled into spawn timetables once
+LEVELS = levels.load_levels(resource_path("levels.json"))
+LEADERBOARD_LEVELS = tuple(LEVELS)
+
+# Scores are recorded locally first and uploaded by a background sync,
+# the leaderboard is read from the local copy it pulls. The SQLite file
+# is opened on first use, the splash screen starts the sync
+LOCAL_SCORES = db.LocalScoreStore(os.environ.get("SUPERMAN_SCORES") or os.path.join(
+  os.path.expanduser("~"), ".superman_survival", "scores.sqlite3"
+))
+LEADERBOARD = db.LeaderboardCache(loader=LOCAL_SCORES.getTopScores)
+# Sync through the leaderboard service when one is configured, else
+# straight with Postgres
+LEADERBOARD_URL = os.environ.get("SUPERMAN_LEADERBOARD_URL")
+SCORES = db.ScoreSync(
+  LOCAL_SCORES,
+  database_factory=(lambda: db.LeaderboardClient(LEADERBOARD_URL)) if LEADERBOARD_URL else db.DataBase,
+  levels=LEADERBOARD_LEVELS,
+  leaderboard=LEADERBOARD,
+)
+
+# Collisions take a voice from movement sounds, never the other way round
+SFX_COLLISION_PRIORITY = 10
+SFX_MOVEMENT_PRIORITY = 0
+# Key mashing replays a movement sound at most this often, in seconds
+SFX_MOVEMENT_INTERVAL = 0.12
+
+# Every image and sound effect of the game, decoded once by the splash
+# screen. The music is streamed by resources.MUSIC instead
+TEXTURE_ASSETS = tuple(resource_path(path) for path in (
+  "images/missile.png",
+  "images/superman.png",
+  "assets/header.jpg",
+)) + tuple(sorted({resource_path(level.background) for level in LEVELS.values()}))
+SOUND_ASSETS = tuple(resource_path(path) for path in (
+  "sounds/Collision.wav",
+  "sounds/Rising_putter.wav",
+  "sounds/Falling_putter.wav",
+))
+
+def box_extents(sprite):
+    """Return the (left, bottom, right, top) of a sprite's hit box, relative
+    to its center
+    """
+    x, y = sprite.position
+    return (sprite.left - x, sprite.bottom - y, sprite.right - x, sprite.top - y)
 
-  return os.path.join(base_path, relative_path)
 
 class FlyingSprite(arcade.Sprite):
     """Base class for all flying sprites
     Flying sprites include enemies and clouds
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.slot = None
+        # Center relative to the level's scroll offset, set on spawn
+        self.home_x = 0.0
+        self.home_y = 0.0
+
     def update(self):
         """Update the position of the sprite
         When it moves off screen to the left, remove it
@@ -40,7 +105,55 @@ class FlyingSprite(arcade.Sprite):
 
         # Remove us if we're off screen
         if self.right < 0:
-            self.remove_from_sprite_lists()
+            self.recycle()
+
+    def recycle(self):
+        """Remove the sprite from its lists and hand it back to its pool"""
+        self.remove_from_sprite_lists()
+        if self.pool is not None:
+            self.pool.release(self)
+
+
+class EnemyPool():
+    """Fixed-capacity set of pre-built enemies
+    Enemies are taken from the pool when spawned and given back
+    when they leave the screen, so nothing is allocated per spawn
+    """
+
+    def __init__(self, texture, scaling, capacity):
+        """Build every enemy of the pool up front
+
+        Arguments:
+            texture {arcade.Texture} -- Shared texture of the enemies
+            scaling {float} -- Sprite scale
+            capacity {int} -- Maximum number of live enemies
+        """
+        self.capacity = capacity
+        self.sprites = []
+        for slot in range(capacity):
+            sprite = FlyingSprite(texture=texture, scale=scaling)
+            sprite.pool = self
+            sprite.slot = slot
+            self.sprites.append(sprite)
+        self._free = list(reversed(range(capacity)))
+        self.dropped = 0
+
+    @property
+    def active_count(self):
+        return self.capacity - len(self._free)
+
+    def acquire(self):
+        """Return a free enemy, or None when every enemy is on screen"""
+        if not self._free:
+            self.dropped += 1
+            return None
+        return self.sprites[self._free.pop()]
+
+    def release(self, sprite):
+        """Deactivate an enemy and make it available again"""
+        sprite.velocity = (0, 0)
+        sprite.position = (0, 0)
+        self._free.append(sprite.slot)
 
 
 class Level(arcade.View):
@@ -51,11 +164,17 @@ class Level(arcade.View):
     Collisions end the game
     """
 
-    def __init__(self,scaling, userName):
-      """Initialize the game"""
-      super().__init__()
+    def __init__(self,scaling, userName, level, window=None, seed=None):
+      """Initialize the game
+
+      Arguments:
+          level {int} -- Number of the level in levels.json
+          seed {int} -- Seed of the spawn timeline, random if not given
+      """
+      super().__init__(window)
       self.userName = userName
       self.scaling = scaling
+      self.definition = LEVELS[level]
       # Setup the empty sprite lists
       self.enemies_list = arcade.SpriteList()
       self.all_sprites = arcade.SpriteList()
@@ -65,12 +184,70 @@ class Level(arcade.View):
       self.background = None
       self.speed_up = 250
       self.is_speed_up = False
-      self.level = None
+      self.level = level
+      # Maximum number of missiles on screen at once
+      self.enemy_pool_size = self.definition.pool_size
+      # Sync enemy sprites with the NumPy kernel when NumPy is available
+      self.vectorized = physics.load_numpy() is not None
+      self.movement = None
+      # Enemies on screen, oldest first, and hit box extents from the center
+      self.live_enemies = deque()
+      self.enemy_box = None
+      self.player_box = None
+      self.player_limits = None
+      # Broad phase for player-vs-missile collisions
+      self.collision_cell_size = 128
+      # Largest relative move between two polygon tests of a sweep
+      self.sweep_spacing = 4.0
+      self.enemy_index = None
+      # Every spawn of the run follows from this seed
+      self.seed = random.randrange(2 ** 32) if seed is None else seed
+      self.spawn_plan = None
+      # Headless runs skip audio, score submission and the leaderboard view
+      self.headless = False
+      self.finished = False
+      self.profiler_lines = []
+      # Fixed simulation rate, independent of the display refresh rate
+      self.tick_rate = 120
+      self.max_ticks_per_frame = 8
+      self.accumulator = 0.0
+      # The player moves in plain floats, its sprite follows when needed
+      self.player_x = 0.0
+      self.player_y = 0.0
+      self.player_previous = (0, 0)
+      # Simulated time and ticks since the start, index of the next spawn.
+      # The score follows the ticks, so a replay re-simulates it exactly
+      self.elapsed = 0.0
+      self.ticks = 0
+      self.next_spawn = 0
+      self.replay = None
 
     def setup(self):
         """Get the game ready to play"""        
 
+        self.background = resources.RESOURCES.texture(
+            resource_path(self.definition.background)
+        )
+        self.enemy_velocity = self.definition.velocity_at(0.0)
+        self.spawn_plan = spawns.SpawnPlan(self.definition, self.seed, self.window.height)
+        # Key presses are recorded against ticks to re-simulate the run
+        self.replay = replay.Replay(
+            self.level, self.seed, self.window.width, self.window.height,
+            self.scaling, self.tick_rate,
+        )
+
         self.missle_url = resource_path("images/missile.png")
+        # Pre-build the missiles from the shared texture so spawning allocates nothing
+        self.enemy_pool = EnemyPool(
+            resources.TEXTURES.get(self.missle_url),
+            self.scaling,
+            self.enemy_pool_size,
+        )
+        if self.vectorized:
+            self.movement = physics.MovementKernel(self.enemy_pool_size)
+        self.enemy_index = physics.ScrollingSpatialHash(self.collision_cell_size)
+        self.live_enemies = deque()
+        self.enemy_box = box_extents(self.enemy_pool.sprites[0])
         self.collision_sound_url = resource_path("sounds/Collision.wav")
         self.rising_sound_url = resource_path("sounds/Rising_putter.wav")
         self.falling_sound_url = resource_path("sounds/Falling_putter.wav")
@@ -79,63 +256,95 @@ class Level(arcade.View):
         self.jet_url = resource_path("images/superman.png")
         self.background_sound_url = resource_path("sounds/Apoxode_-_Electric_1.wav")
 
-        self.player = arcade.Sprite(self.jet_url, 0.3)
+        self.player = arcade.Sprite(
+            texture=resources.RESOURCES.texture(self.jet_url), scale=0.3
+        )
         self.player.center_y = self.window.height / 2
         self.player.left = 10
+        self.player_x, self.player_y = self.player.position
+        self.player_previous = self.player.position
+        self.player_box = box_extents(self.player)
+        # Range of the player's center that keeps it on screen
+        left, bottom, right, top = self.player_box
+        self.player_limits = (
+            -left, -bottom, self.window.width - right, self.window.height - top
+        )
         self.all_sprites.append(self.player)
 
-    
-        arcade.schedule(self.add_score, 1.0)
-
-        # Load our background music
-        # Sound source: http://ccmixter.org/files/Apoxode/59262
-        # License: https://creativecommons.org/licenses/by/3.0/
-        
-        self.background_music = arcade.load_sound(
-            self.background_sound_url
+        # The score text is laid out again only when the score changes
+        self.hud = hud.Hud()
+        self.hud.add(
+            "score",
+            self.userName.replace("{", "{{").replace("}", "}}") + " : {}",
+            self.window.width-30,
+            self.window.height-30,
+            value=self.scores,
+            color=arcade.color.BLACK,
+            font_size=15,
+            anchor_x="right",
         )
 
-        # Load our other sounds
+        # Load our sounds
         # Sound sources: Jon Fincher
         
-        self.collision_sound = arcade.load_sound(self.collision_sound_url)
+        self.collision_sound = resources.RESOURCES.sound(self.collision_sound_url)
         
-        self.move_up_sound = arcade.load_sound(self.rising_sound_url)
+        self.move_up_sound = resources.RESOURCES.sound(self.rising_sound_url)
         
-        self.move_down_sound = arcade.load_sound(self.falling_sound_url)
+        self.move_down_sound = resources.RESOURCES.sound(self.falling_sound_url)
 
-        # Start the background music
-        self.media_player = arcade.play_sound(self.background_music)
+        # Start the background music, streamed from disk
+        # Sound source: http://ccmixter.org/files/Apoxode/59262
+        # License: https://creativecommons.org/licenses/by/3.0/
+        if not self.headless:
+            resources.MUSIC.play(self.background_sound_url)
 
         # Unpause everything and reset the collision timer
         self.paused = False
         self.collided = False
+        self.hit_by = []
         self.collision_timer = 0.0
 
-    def add_score(self, delta_time: float):
-      self.scores+=10
+    def play_sound(self, sound, priority=SFX_MOVEMENT_PRIORITY, min_interval=0.0):
+        """Play a sound effect on the shared voice pool
+
+        Returns:
+            pyglet.media.Player -- The voice, None if dropped or headless
+        """
+        if self.headless:
+            return None
+        return resources.SFX.play(sound, priority, min_interval)
 
-    def add_enemy(self, delta_time: float):
+    @PROFILER.timed("add_enemy")
+    def add_enemy(self, top):
         """Adds a new enemy to the screen
 
         Arguments:
-            delta_time {float} -- How much time has passed since the last call
+            top {int} -- Height of the enemy's top edge
         """
 
-        # First, create the new enemy sprite
-        
-        enemy = FlyingSprite(self.missle_url, self.scaling)
-
-        # Set its position to a random height and off screen right
-        enemy.left = random.randint(self.window.width, self.window.width + 10)
-        enemy.top = random.randint(10, self.window.height - 10)
+        # First, take a free enemy sprite from the pool
+        enemy = self.enemy_pool.acquire()
+        if enemy is None:
+            return
 
-        # Set its speed to a random speed heading left
-        enemy.velocity = self.enemy_velocity
+        # Place it at the planned height, just off screen right. The sprite
+        # itself is moved there when it is drawn or tested, see sync_sprites
+        left, _, _, top_edge = self.enemy_box
+        self.track_enemy(enemy, self.window.width - left, top - top_edge)
 
         # Add it to the enemies list
         self.enemies_list.append(enemy)
-        self.all_sprites.append(enemy)
+        self.live_enemies.append(enemy)
+
+    def track_enemy(self, enemy, x, y):
+        """Start scrolling an enemy from a center position on screen"""
+        enemy.home_x = x - self.enemy_index.offset
+        enemy.home_y = y
+        if self.movement is not None:
+            self.movement.activate(enemy.slot, (enemy.home_x, enemy.home_y))
+        left, bottom, right, top = self.enemy_box
+        self.enemy_index.insert_box(enemy, (x + left, y + bottom), (x + right, y + top))
 
     def on_key_press(self, symbol: int, modifiers: int):
         """Handle user keyboard input
@@ -148,6 +357,7 @@ class Level(arcade.View):
             symbol {int} -- Which key was pressed
             modifiers {int} -- Which modifiers were pressed
         """
+        self.record_key("press", symbol, modifiers)
         if symbol == arcade.key.Q:
             # Quit immediately
             self.on_exit()
@@ -167,14 +377,19 @@ class Level(arcade.View):
         if symbol == arcade.key.P:
             self.paused = not self.paused
 
+        if symbol == arcade.key.F3:
+            # Show frame timings, turning the profiler on if needed
+            PROFILER.enabled = True
+            PROFILER.overlay = not PROFILER.overlay
+
         if symbol == arcade.key.I or symbol == arcade.key.UP:            
             self.player.change_y = self.player_velocity
             
-            arcade.play_sound(self.move_up_sound)
+            self.play_sound(self.move_up_sound, min_interval=SFX_MOVEMENT_INTERVAL)
 
         if symbol == arcade.key.K or symbol == arcade.key.DOWN:
             self.player.change_y = -self.player_velocity
-            arcade.play_sound(self.move_down_sound)
+            self.play_sound(self.move_down_sound, min_interval=SFX_MOVEMENT_INTERVAL)
 
         if symbol == arcade.key.J or symbol == arcade.key.LEFT:
             self.player.change_x = -self.player_velocity
@@ -189,6 +404,7 @@ class Level(arcade.View):
             symbol {int} -- Which key was pressed
             modifiers {int} -- Which modifiers were pressed
         """
+        self.record_key("release", symbol, modifiers)
         if (
             symbol == arcade.key.I
             or symbol == arcade.key.K
@@ -215,6 +431,11 @@ class Level(arcade.View):
           if self.player.change_y < 0:
             self.player.change_y = -self.player_velocity
 
+    def record_key(self, kind, symbol, modifiers):
+        # The profiler overlay has no effect on the game
+        if self.replay is not None and symbol != arcade.key.F3:
+            self.replay.record(self.ticks, kind, symbol, modifiers)
+
     def on_update(self, delta_time: float):
         """Update the positions and statuses of all game objects
         If we're paused, do nothing
@@ -238,40 +459,192 @@ class Level(arcade.View):
         if self.paused:
             return
 
-        # Did we hit anything? If so, end the game
-        if self.player.collides_with_list(self.enemies_list):
+        # Run as many fixed ticks as the elapsed time covers
+        tick = 1 / self.tick_rate
+        self.accumulator += delta_time
+        ticks = 0
+        while self.accumulator + 1e-9 >= tick and not self.collided:
+            if ticks == self.max_ticks_per_frame:
+                # Too far behind: drop the backlog rather than spiral
+                self.accumulator = 0.0
+                break
+            self.update_tick(tick)
+            self.accumulator -= tick
+            ticks += 1
+
+    def update_tick(self, tick: float):
+        """Advance the game by one fixed simulation step
+
+        Arguments:
+            tick {float} -- Length of the step in seconds
+        """
+        self.ticks += 1
+        self.elapsed = self.ticks / self.tick_rate
+        # Ten points per second of play, pauses do not count
+        scores = self.ticks // self.tick_rate * 10
+        if scores != self.scores:
+            self.scores = scores
+            if not self.headless:
+                self.hud.set("score", self.scores)
+        self.enemy_velocity = self.definition.velocity_at(self.elapsed)
+
+        # Spawn whatever the run's timeline has due by now
+        while self.spawn_plan.time(self.next_spawn) <= self.elapsed:
+            self.add_enemy(self.spawn_plan.top(self.next_spawn))
+            self.next_spawn += 1
+
+        # Every enemy moves with the scroll offset, only the player on its own
+        previous_x, previous_y = self.player_x, self.player_y
+        self.player_previous = (previous_x, previous_y)
+        with PROFILER.measure("movement"):
+            enemy_dx = self.enemy_velocity[0] * tick
+            self.enemy_index.scroll(enemy_dx)
+            x = previous_x + self.player.change_x * tick
+            y = previous_y + self.player.change_y * tick
+
+            # Keep the player on screen
+            low_x, low_y, high_x, high_y = self.player_limits
+            if y > high_y:
+                y = high_y
+            if x > high_x:
+                x = high_x
+            if y < low_y:
+                y = low_y
+            if x < low_x:
+                x = low_x
+            self.player_x, self.player_y = x, y
+
+        # Did we hit anything on the way? If so, end the game
+        hits = self.collides_with_enemies((enemy_dx, 0.0), (x - previous_x, y - previous_y))
+        if hits:
             self.collided = True
+            self.hit_by = hits
             self.collision_timer = 0.0
-            arcade.play_sound(self.collision_sound)
+            self.play_sound(self.collision_sound, priority=SFX_COLLISION_PRIORITY)
+
+        # Give the enemies that left the screen back to the pool. They all
+        # move together, so they leave in the order they spawned
+        live = self.live_enemies
+        edge = -self.enemy_index.offset - self.enemy_box[2]
+        while live and live[0].home_x < edge:
+            self.recycle_enemy(live.popleft())
+
+    @PROFILER.timed("collision")
+    def collides_with_enemies(self, enemy_step=(0.0, 0.0), player_step=(0.0, 0.0)):
+        """Return the enemies that touched the player during the last tick
+        Hit boxes are swept over the tick, so fast missiles cannot pass
+        through the player between two ticks. Only the enemies whose box
+        crossed the player's get the exact polygon test
 
-        # Update everything
-        for sprite in self.all_sprites:
-            sprite.center_x = int(
-                sprite.center_x + sprite.change_x * delta_time
-            )
-            sprite.center_y = int(
-                sprite.center_y + sprite.change_y * delta_time
+        Arguments:
+            enemy_step {tuple} -- How far every enemy moved this tick
+            player_step {tuple} -- How far the player moved this tick
+        """
+        dx = enemy_step[0] - player_step[0]
+        dy = enemy_step[1] - player_step[1]
+        x, y = self.player_x, self.player_y
+        left, bottom, right, top = self.player_box
+        player_lo = (x + left, y + bottom)
+        player_hi = (x + right, y + top)
+
+        # Only the missiles in the grid cells around the player can touch it
+        margin = 4 + abs(dx) + abs(dy)
+        candidates = self.enemy_index.query_box(player_lo, player_hi, margin=margin)
+        if not candidates:
+            return []
+
+        offset = self.enemy_index.offset
+        left, bottom, right, top = self.enemy_box
+        # Most candidates only share a cell with the player: skip the sweep
+        # for those whose box, grown by the tick's movement, misses it
+        reach_x = abs(dx)
+        reach_y = abs(dy)
+        crossed = []
+        for enemy in candidates:
+            enemy_x = enemy.home_x + offset
+            enemy_y = enemy.home_y
+            if (
+                enemy_x + right + reach_x <= player_lo[0]
+                or enemy_x + left - reach_x >= player_hi[0]
+                or enemy_y + top + reach_y <= player_lo[1]
+                or enemy_y + bottom - reach_y >= player_hi[1]
+            ):
+                continue
+            overlap = physics.sweep_box(
+                (enemy_x + left, enemy_y + bottom),
+                (enemy_x + right, enemy_y + top),
+                (dx, dy),
+                player_lo,
+                player_hi,
             )
-        # self.all_sprites.update()
-
-        # Keep the player on screen
-        if self.player.top > self.window.height:
-            self.player.top = self.window.height
-        if self.player.right > self.window.width:
-            self.player.right = self.window.width
-        if self.player.bottom < 0:
-            self.player.bottom = 0
-        if self.player.left < 0:
-            self.player.left = 0
+            if overlap is not None:
+                crossed.append((enemy, *overlap))
+        if not crossed:
+            return []
+
+        # Only the polygon test needs the sprites where the simulation has them
+        self.player.position = (x, y)
+        for enemy, _, _ in crossed:
+            enemy.position = (enemy.home_x + offset, enemy.home_y)
+        return [
+            enemy
+            for enemy, enter, leave in crossed
+            if self.polygons_touch(enemy, dx, dy, enter, leave)
+        ]
+
+    def polygons_touch(self, enemy, dx, dy, enter, leave):
+        """Exact hit box test along the part of the tick where the boxes overlap
+
+        Arguments:
+            enemy {FlyingSprite} -- Enemy at its end-of-tick position
+            dx, dy {float} -- Enemy movement relative to the player this tick
+            enter, leave {float} -- Overlap interval as fractions of the tick
+        """
+        player_points = self.player.get_adjusted_hit_box()
+        enemy_points = enemy.get_adjusted_hit_box()
+        distance = (leave - enter) * math.hypot(dx, dy)
+        samples = math.ceil(distance / self.sweep_spacing)
+        for sample in range(samples + 1):
+            time = enter + (leave - enter) * sample / samples if samples else enter
+            back = 1.0 - time
+            points = [(x - back * dx, y - back * dy) for x, y in enemy_points]
+            if arcade.are_polygons_intersecting(player_points, points):
+                return True
+        return False
+
+    def recycle_enemy(self, enemy):
+        self.enemy_index.remove(enemy)
+        if self.movement is not None:
+            self.movement.deactivate(enemy.slot)
+        enemy.recycle()
+
+    def sync_sprites(self):
+        """Move the sprites to where the simulation has them, before drawing"""
+        self.player.position = (self.player_x, self.player_y)
+        offset = self.enemy_index.offset
+        if self.movement is not None:
+            self.movement.sync(self.enemy_pool.sprites, offset)
+        else:
+            for enemy in self.live_enemies:
+                enemy.position = (enemy.home_x + offset, enemy.home_y)
 
     def on_exit(self):
-      arcade.unschedule(self.add_score)
-      arcade.unschedule(self.add_enemy)
-      DATABASE.createConn()
-      DATABASE.addScore(self.userName,self.scores, self.level)
-      DATABASE.closeConn()
-      arcade.stop_sound(self.media_player)
-      stat_view = StatMenu(self.scaling)
+      self.finished = True
+      PROFILER.dump()
+      if self.replay is not None:
+        self.replay.ticks = self.ticks
+        self.replay.scores = self.scores
+      if self.headless:
+        return
+      if REPLAY_DIR:
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        self.replay.save(os.path.join(
+          REPLAY_DIR, f"level{self.level}-{int(time.time())}-{self.seed}.smr"
+        ))
+      # Only a local write, the upload happens on the sync thread
+      score_submission = SCORES.submit(self.userName, self.scores, self.level)
+      resources.MUSIC.pause()
+      stat_view = StatMenu(self.scaling, score_submission)
       self.window.show_view(stat_view)
 
     def on_draw(self):
@@ -281,66 +654,103 @@ class Level(arcade.View):
         arcade.draw_lrwh_rectangle_textured(0, 0,
                                             self.window.width, self.window.height,
                                             self.background)
-        self.all_sprites.draw()
-        arcade.draw_text(
-            f"{self.userName} : {self.scores}",
-            self.window.width-30 - (len(self.userName)*15),
-            self.window.height-30,
-            arcade.color.BLACK,
-            15,
-            anchor_x="center",
-        )
+        with PROFILER.measure("draw_sprites"):
+            self.sync_sprites()
+            self.draw_interpolated()
+        with PROFILER.measure("draw_text"):
+            self.hud.draw()
+        if PROFILER.overlay:
+            self.draw_profiler_overlay()
+        PROFILER.end_frame()
+
+    def draw_interpolated(self):
+        """Draw the sprites between the last two ticks
+        Every enemy moved by the same step, so blending them is one shift
+        of the viewport rather than a move of every sprite
+        """
+        width, height = self.window.width, self.window.height
+        behind = 1.0 - min(self.accumulator * self.tick_rate, 1.0)
+        enemy_shift = self.enemy_velocity[0] / self.tick_rate * behind
+        arcade.set_viewport(enemy_shift, enemy_shift + width, 0, height)
+        self.enemies_list.draw()
+        player_x, player_y = self.player.position
+        shift_x = (player_x - self.player_previous[0]) * behind
+        shift_y = (player_y - self.player_previous[1]) * behind
+        arcade.set_viewport(shift_x, shift_x + width, shift_y, shift_y + height)
+        self.player.draw()
+        arcade.set_viewport(0, width, 0, height)
+
+    def draw_profiler_overlay(self):
+        # Recomputing percentiles every frame would skew the numbers shown
+        if PROFILER.frames % 30 == 0:
+            sfx = resources.SFX.stats()
+            textures = resources.TEXTURES.stats()
+            self.profiler_lines = PROFILER.summary() + [
+                f"sfx voices {sfx['active']}/{sfx['voices']}  dropped {sfx['dropped']}"
+                f"  stolen {sfx['stolen']}",
+                f"textures {textures['textures']}  hits {textures['hits']}"
+                f"  misses {textures['misses']}  hit rate {textures['hit_rate']:.0%}",
+            ]
+        for row, line in enumerate(self.profiler_lines):
+            arcade.draw_text(
+                line,
+                10,
+                self.window.height - 20 - row * 16,
+                arcade.color.BLACK,
+                11,
+                font_name="Courier New",
+            )
 
     def on_show_view(self):
       self.setup()
 
-class Level1(Level):
-  def __init__(self,scaling, userName):
-    super().__init__(scaling,userName)
-  
-  def setup(self):
-    # Set the background color
-    
-    self.enemy_velocity = (-150,0)
-    self.background = arcade.load_texture("./images/background3.jpg")
-    self.level = 1
-
-    # Spawn a new enemy every second
-    arcade.schedule(self.add_enemy, 1.0)
-
-    super().setup()
-
-class Level2(Level):
-  def __init__(self,scaling, userName):
-    super().__init__(scaling,userName)
-  
-  def setup(self):
-    # Set the background color
-    
-    self.enemy_velocity = (-350,0)
-    self.background = arcade.load_texture("./images/background2.jpg")
-    self.level = 2
-
+class SplashView(arcade.View):
+  """Loading screen shown at startup
+  Decodes every texture and sound on a thread pool, then opens the menu
+  """
 
-    # Spawn a new enemy every second
-    arcade.schedule(self.add_enemy, 0.5)
-
-    super().setup()
+  def __init__(self, scaling):
+    super().__init__()
+    self.scaling = scaling
+    self.loading = []
 
-class Level3(Level):
-  def __init__(self,scaling, userName):
-    super().__init__(scaling,userName)
-  
-  def setup(self):
-    # Set the background color
-    
-    self.enemy_velocity = (-650,0)
-    self.background = arcade.load_texture("./images/background1.jpg")
-    self.level = 3
+  def on_show_view(self):
+    arcade.set_background_color(arcade.color.BEIGE)
+    self.window.set_icon(pyglet_load(resource_path('images/superman.ico')))
+    self.loading = resources.RESOURCES.preload(TEXTURE_ASSETS, SOUND_ASSETS)
+    # Modules kept off the startup path are imported in the background,
+    # the menu does not wait for them and a missing driver is not fatal
+    resources.RESOURCES.preload(tasks=(physics.load_numpy, db.loadDriver), workers=1)
+    # Upload scores left from offline sessions and pull the leaderboard
+    SCORES.start()
+
+  def on_update(self, delta_time: float):
+    if not all(future.done() for future in self.loading):
+      return
+    for future in self.loading:
+      # Raise load errors here rather than in the middle of a level
+      future.result()
+    STARTUP.mark("assets")
+    for path, seconds in resources.RESOURCES.report():
+      print(f"loaded {os.path.basename(path)} in {seconds * 1000:.1f} ms")
+    textures = resources.TEXTURES.stats()
+    print(f"textures: {textures['textures']} decoded, {textures['hits']} hits, "
+          f"{textures['misses']} misses")
+    print(STARTUP.report())
+    self.window.show_view(MainMenu(self.scaling))
 
-    # Spawn a new enemy every second
-    arcade.schedule(self.add_enemy, 0.1)
-    super().setup()
+  def on_draw(self):
+    self.clear()
+    STARTUP.mark("first frame")
+    done = sum(future.done() for future in self.loading)
+    arcade.draw_text(
+      f"Loading... {done}/{len(self.loading)}",
+      self.window.width / 2,
+      self.window.height / 2,
+      arcade.color.BLACK,
+      24,
+      anchor_x="center",
+    )
 
 
 class QuitButton(arcade.gui.UIFlatButton):
@@ -351,11 +761,9 @@ class MainMenu(arcade.View):
   def __init__(self,scaling):
     super().__init__()
     
-    self.background = arcade.load_texture("./images/шапка.jpg")
+    self.background = resources.RESOURCES.texture(resource_path("assets/header.jpg"))
     self.scaling = scaling  
-    self.level1_button = None
-    self.level2_button = None
-    self.level3_button = None
+    self.level_buttons = []
     self.label = None
     self.input_field = None
     self.submit_button = None
@@ -367,13 +775,9 @@ class MainMenu(arcade.View):
 
   def setup(self):   
 
-    arcade.get_window().set_icon(pyglet_load(resource_path('images/superman.ico')))
-
     arcade.set_background_color(arcade.color.BEIGE)    
     
-    self.level1_button = None
-    self.level2_button = None
-    self.level3_button = None
+    self.level_buttons = []
     # Create a text label
     self.label = gui.UILabel(
         text="Введите свое имя:",
@@ -444,34 +848,17 @@ class MainMenu(arcade.View):
     self.manager = gui.UIManager()
     self.manager.enable()     
     
-    self.level1_button = gui.UIFlatButton(
-      color=arcade.color.DARK_BLUE_GRAY,
-      text='Level1',
-      width=130)
-    # --- Method 2 for handling click events,
-    # assign self.on_click_start as callback
-    self.level1_button.on_click = self.on_clickLevel1 
-
-    self.level2_button = gui.UIFlatButton(
-      color=arcade.color.DARK_BLUE_GRAY,
-      text='Level2',
-      width=130)
-    # --- Method 2 for handling click events,
-    # assign self.on_click_start as callback
-    self.level2_button.on_click = self.on_clickLevel2 
-
-    self.level3_button = gui.UIFlatButton(
-      color=arcade.color.DARK_BLUE_GRAY,
-      text='Level3',
-      width=130)
-    # --- Method 2 for handling click events,
-    # assign self.on_click_start as callback
-    self.level3_button.on_click = self.on_clickLevel3 
-
+    # One button per level in levels.json
     self.v_box = gui.UIBoxLayout()
-    self.v_box.add(self.level1_button.with_space_around(bottom=10))
-    self.v_box.add(self.level2_button.with_space_around(bottom=10))
-    self.v_box.add(self.level3_button.with_space_around(bottom=10))
+    self.level_buttons = []
+    for level in LEVELS:
+      button = gui.UIFlatButton(
+        color=arcade.color.DARK_BLUE_GRAY,
+        text=f'Level{level}',
+        width=130)
+      button.on_click = lambda event, level=level: self.on_clickLevel(level)
+      self.level_buttons.append(button)
+      self.v_box.add(button.with_space_around(bottom=10))
     self.v_box.add(self.back_button.with_space_around(bottom=10))
     self.manager.add(
       arcade.gui.UIAnchorWidget(
@@ -484,18 +871,8 @@ class MainMenu(arcade.View):
       stat_view = StatMenu(self.scaling)
       self.window.show_view(stat_view)
 
-  def on_clickLevel1(self,event):
-    game_view = Level1(self.scaling,self.input_field.text)
-    self.window.hide_view()
-    self.window.show_view(game_view)
-    
-  def on_clickLevel2(self,event):
-    game_view = Level2(self.scaling,self.input_field.text)
-    self.window.hide_view()
-    self.window.show_view(game_view)
-    
-  def on_clickLevel3(self,event):
-    game_view = Level3(self.scaling,self.input_field.text)
+  def on_clickLevel(self,level):
+    game_view = Level(self.scaling,self.input_field.text,level)
     self.window.hide_view()
     self.window.show_view(game_view)
       
@@ -516,9 +893,11 @@ class MainMenu(arcade.View):
     self.setup()
 
 class StatMenu(arcade.View):    
-  def __init__(self,scaling):
+  def __init__(self,scaling, score_submission = None):
     super().__init__()
     self.scaling = scaling
+    self.score_submission = score_submission
+    self.refresh_pending = False
     self.manager = gui.UIManager()
     self.manager.enable()
 
@@ -530,33 +909,18 @@ class StatMenu(arcade.View):
         font_size=20,
         font_name="Kenney Future")
 
-    # Create a text label
-    self.textArea1 = gui.UITextArea(
-        text="Level 1:",
-        text_color=arcade.color.DARK_RED,
-        width=300,
-        height=self.window.height*0.9,
-        multiline = True,
-        font_size=20,
-        font_name="Kenney Future")
-      
-    self.textArea2 = gui.UITextArea(
-        text="Level 2:",
-        text_color=arcade.color.DARK_RED,
-        width=300,
-        height=self.window.height*0.9,
-        multiline = True,
-        font_size=20,
-        font_name="Kenney Future")
-      
-    self.textArea3 = gui.UITextArea(
-        text="Level 3:",
+    # Create a text area per level
+    self.text_areas = [
+      gui.UITextArea(
+        text=f"Level {level}:",
         text_color=arcade.color.DARK_RED,
         width=300,
         height=self.window.height*0.9,
         multiline = True,
         font_size=20,
         font_name="Kenney Future")
+      for level in LEADERBOARD_LEVELS
+    ]
 
     
     # Create a button
@@ -569,11 +933,10 @@ class StatMenu(arcade.View):
     
     self.v_box = gui.UIBoxLayout()
     self.h_box = gui.UIBoxLayout(vertical=False)
-    self.h_box.add(self.textArea1)
-    self.h_box.add(gui.UISpace(width=30))
-    self.h_box.add(self.textArea2)
-    self.h_box.add(gui.UISpace(width=30))
-    self.h_box.add(self.textArea3)
+    for column, text_area in enumerate(self.text_areas):
+      if column:
+        self.h_box.add(gui.UISpace(width=30))
+      self.h_box.add(text_area)
     self.v_box.add(self.label)
     self.v_box.add(self.h_box.with_space_around(bottom=0))
     self.v_box.add(back_button)
@@ -587,27 +950,15 @@ class StatMenu(arcade.View):
 
   def update_text(self):
     
-      DATABASE.createConn()
-      self.scores1 = DATABASE.getAllScores(1)
-      self.scores2 = DATABASE.getAllScores(2)
-      self.scores3 = DATABASE.getAllScores(3)
-      DATABASE.closeConn()
-      str = "Level 1:\n"
-      for score in self.scores1:
-        str+=f"{score[0]} - {score[1]}\n"
-      
-      self.v_box.children[1].children[0].children[0].doc.text = str
-      str = "Level 2:\n"
-      for score in self.scores2:
-        str+=f"{score[0]} - {score[1]}\n"
-      
-      self.v_box.children[1].children[0].children[2].doc.text = str
-
-      str = "Level 3:\n"
-      for score in self.scores3:
-        str+=f"{score[0]} - {score[1]}\n"
-      
-      self.v_box.children[1].children[0].children[4].doc.text = str
+      # Levels not cached yet are loaded in the background and shown once they arrive
+      scores = LEADERBOARD.get(LEADERBOARD_LEVELS, callback=self.on_leaderboard_loaded)
+      for level, text_area in zip(LEADERBOARD_LEVELS, self.text_areas):
+        str = f"Level {level}:\n"
+        if level not in scores:
+          str += "Loading...\n" if LEADERBOARD.loading(level) else "Not available\n"
+        for score in scores.get(level, ()):
+          str+=f"{score[0]} - {score[1]}\n"
+        text_area.doc.text = str
       
 
   def on_click(self, event):
@@ -619,10 +970,27 @@ class StatMenu(arcade.View):
       arcade.start_render()
       self.manager.draw()
 
+  def on_submission_done(self, future):
+    # Runs on the submitter thread, the text is refreshed in on_update
+    self.refresh_pending = True
+
+  def on_leaderboard_loaded(self):
+    # Runs on the loader thread, the text is refreshed in on_update
+    self.refresh_pending = True
+
+  def on_update(self, delta_time: float):
+    if self.refresh_pending:
+      self.refresh_pending = False
+      self.update_text()
+
   def on_show_view(self):
     """Called when switching to this view."""
     arcade.set_background_color(arcade.color.WHITE)
-    self.update_text()
+    if self.score_submission is not None and not self.score_submission.done():
+      self.text_areas[0].doc.text = "Saving score..."
+      self.score_submission.add_done_callback(self.on_submission_done)
+    else:
+      self.update_text()
 
 
 
@@ -0,0 +1,108 @@
+"""Measure createConn/closeConn latency with and without the connection pool
+
+Runs against a real Postgres when --host is given, otherwise against a
+stand-in driver that sleeps to imitate the connection handshake.
+
+    python benchmarks/db_latency.py
+    python benchmarks/db_latency.py --host localhost --user postgres --password postgres
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import database as db
+
+
+class StandInConnection():
+    closed = False
+
+    def cursor(self):
+        return StandInCursor()
+
+    def rollback(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class StandInCursor():
+    def execute(self, query, params=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class StandInDriver():
+    """Imitates psycopg2.connect with a fixed handshake delay"""
+
+    def __init__(self, handshake):
+        self.handshake = handshake
+
+    def connect(self, **kwargs):
+        time.sleep(self.handshake)
+        return StandInConnection()
+
+
+def measure(database, rounds, **conn_args):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        database.createConn(**conn_args)
+        database.cursor.execute("select 1")
+        database.closeConn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def fresh_connection(driver, rounds, **conn_args):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        conn = driver.connect(dbname="superman_survival", **conn_args)
+        cursor = conn.cursor()
+        cursor.execute("select 1")
+        cursor.close()
+        conn.close()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<10} mean {statistics.mean(samples) * 1000:8.3f} ms   p99 {p99 * 1000:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host")
+    parser.add_argument("--user", default="user1")
+    parser.add_argument("--password", default="user")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--handshake", type=float, default=0.02,
+                        help="stand-in handshake delay in seconds")
+    args = parser.parse_args()
+
+    if args.host:
+        driver = db.loadDriver()
+    else:
+        driver = StandInDriver(args.handshake)
+    conn_args = {"host": args.host or "stand-in", "user": args.user, "password": args.password}
+
+    report("fresh", fresh_connection(driver, args.rounds, **conn_args))
+    database = db.DataBase(driver=driver)
+    report("pooled", measure(database, args.rounds, **conn_args))
+    print(database.pool.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Load-test the leaderboard service
+
+Concurrent keep-alive clients send a mix of top-N reads and score
+writes, then requests/sec and latency percentiles are reported per kind.
+Without --url a local SQLite-backed service is started in-process.
+
+    python benchmarks/leaderboard_load.py
+    python benchmarks/leaderboard_load.py --clients 100 --requests 20000 --writes 0.5
+    python benchmarks/leaderboard_load.py --url http://127.0.0.1:8080
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from leaderboard_service import LeaderboardService, SqliteBackend
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: load\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host, port, count, writes, players, rng, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            if rng.random() < writes:
+                kind = "write"
+                payload = {"scores": [{
+                    "key": uuid.uuid4().hex,
+                    "name": f"player{rng.randrange(players)}",
+                    "level": rng.randint(1, 3),
+                    "score": rng.randrange(10000),
+                }]}
+                start = time.perf_counter()
+                status = await request(reader, writer, "POST", "/scores", payload)
+            else:
+                kind = "read"
+                start = time.perf_counter()
+                status = await request(reader, writer, "GET", "/scores?levels=1,2,3&num=3")
+            if status != 200:
+                raise RuntimeError(f"{kind} failed with HTTP {status}")
+            latencies[kind].append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+def report(name, samples, elapsed):
+    if not samples:
+        return
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<6} {len(samples):>7} req  {len(samples) / elapsed:>9.0f} req/s"
+          f"   p50 {p50 * 1000:7.2f} ms   p99 {p99 * 1000:7.2f} ms")
+
+
+async def run(args):
+    service = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "leaderboard.sqlite3")
+        service = LeaderboardService(SqliteBackend(path), batch_delay=args.batch_delay)
+        server = await service.start("127.0.0.1", 0)
+        host, port = server.sockets[0].getsockname()[:2]
+
+    rng = random.Random(args.seed)
+    latencies = {"read": [], "write": []}
+    per_client = max(1, args.requests // args.clients)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, per_client, args.writes, args.players,
+               random.Random(rng.random()), latencies)
+        for _ in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    report("all", latencies["read"] + latencies["write"], elapsed)
+    report("read", latencies["read"], elapsed)
+    report("write", latencies["write"], elapsed)
+    if service is not None:
+        print(f"{service.written} scores written in {service.batches} batches")
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="service to test, a local stand-in when not given")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--writes", type=float, default=0.2, help="share of requests that write")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--batch-delay", type=float, default=0.005,
+                        help="write batching delay of the local stand-in")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
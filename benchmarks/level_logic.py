@@ -0,0 +1,87 @@
+"""Benchmark the Level game logic headlessly
+
+Reports logic frames per second, allocations per frame and collision
+time with 100, 1k and 10k live missiles, for the vectorized and the
+scalar movement paths. Missiles are packed densely, so the hits column
+counts the ones overlapping the player that need the exact polygon test.
+
+    python benchmarks/level_logic.py
+    python benchmarks/level_logic.py --counts 100 1000 --frames 30
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import physics
+import spawns
+from simulation import Simulation
+
+
+def bench(count, frames, vectorized, seed):
+    sim = Simulation(3, seed=seed, pool_size=count)
+    level = sim.level
+    level.vectorized = vectorized and physics.load_numpy() is not None
+    if not level.vectorized:
+        level.movement = None
+    # Spread the missiles far enough right that most stay alive for the run
+    speed = -level.enemy_velocity[0]
+    sim.populate(count, span=sim.window.width + int(speed * frames * sim.timestep))
+    # An empty spawn timeline keeps the missile count put
+    quiet = replace(level.definition, spawn_times=(), final_interval=None)
+    level.spawn_plan = spawns.SpawnPlan(quiet, seed, sim.window.height)
+
+    collision_time = 0.0
+    hits = 0
+    update_time = 0.0
+    tracemalloc.start()
+    blocks = 0
+    for _ in range(frames):
+        start = time.perf_counter()
+        hits += len(level.collides_with_enemies())
+        collision_time += time.perf_counter() - start
+
+        before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        sim.step()
+        update_time += time.perf_counter() - start
+        blocks += max(0, sys.getallocatedblocks() - before)
+        # Keep the player alive so every frame runs the full update
+        level.collided = False
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "live": len(level.enemies_list),
+        "fps": frames / update_time,
+        "blocks": blocks / frames,
+        "peak_kb": peak / 1024,
+        "collision_us": collision_time / frames * 1e6,
+        "hits": hits / frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'path':<10} {'missiles':>8} {'live':>6} {'logic fps':>10} "
+          f"{'blocks/frame':>13} {'peak KB':>9} {'collision us':>13} {'hits':>6}")
+    for vectorized in (True, False):
+        for count in args.counts:
+            result = bench(count, args.frames, vectorized, args.seed)
+            path = "vectorized" if vectorized else "scalar"
+            print(f"{path:<10} {count:>8} {result['live']:>6} {result['fps']:>10.1f} "
+                  f"{result['blocks']:>13.1f} {result['peak_kb']:>9.1f} "
+                  f"{result['collision_us']:>13.1f} {result['hits']:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,250 @@
-import psycopg2
+import http.client
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from urllib.parse import urlencode, urlsplit
+
+
+def loadDriver():
+  """Import psycopg2 on first use, it is not needed until a score is uploaded"""
+  import psycopg2
+  return psycopg2
+
+
+class ConnectionPool():
+  """Thread-safe pool of open database connections
+  Connections are reused between createConn/closeConn pairs instead of
+  paying the TCP and authentication handshake every time. Connections
+  idle for a while are health checked before reuse, and the ones idle
+  past idle_timeout are closed down to min_size
+  """
+
+  def __init__(self, connect, min_size = 1, max_size = 4, idle_timeout = 300.0, check_after = 30.0):
+    """
+    Arguments:
+        connect {callable} -- Opens a new DB-API connection
+        min_size {int} -- Idle connections kept open during eviction
+        max_size {int} -- Upper bound of open connections
+        idle_timeout {float} -- Seconds before an idle connection is closed
+        check_after {float} -- Idle seconds after which a connection is
+        pinged before it is handed out
+    """
+    self.connect = connect
+    self.min_size = min_size
+    self.max_size = max_size
+    self.idle_timeout = idle_timeout
+    self.check_after = check_after
+    self._idle = deque()
+    self._open = 0
+    self._cond = threading.Condition()
+    self.created = 0
+    self.reused = 0
+    self.discarded = 0
+
+  def acquire(self, timeout = None):
+    """Return an open connection, waiting if max_size are in use"""
+    with self._cond:
+      self._evict_idle()
+      while True:
+        while self._idle:
+          conn, last_used = self._idle.pop()
+          if self._healthy(conn, last_used):
+            self.reused += 1
+            return conn
+          self._discard(conn)
+        if self._open < self.max_size:
+          self._open += 1
+          break
+        if not self._cond.wait(timeout):
+          raise TimeoutError("no database connection available")
+
+    try:
+      conn = self.connect()
+    except Exception:
+      with self._cond:
+        self._open -= 1
+        self._cond.notify()
+      raise
+    self.created += 1
+    return conn
+
+  def release(self, conn):
+    """Give a connection back, rolling back any open transaction"""
+    try:
+      if not getattr(conn, "closed", False):
+        conn.rollback()
+        broken = False
+      else:
+        broken = True
+    except Exception:
+      broken = True
+    with self._cond:
+      if broken:
+        self._discard(conn)
+      else:
+        self._idle.append((conn, time.monotonic()))
+      self._cond.notify()
+
+  def _healthy(self, conn, last_used):
+    if getattr(conn, "closed", False):
+      return False
+    if time.monotonic() - last_used < self.check_after:
+      return True
+    try:
+      cursor = conn.cursor()
+      cursor.execute("select 1")
+      cursor.close()
+      conn.rollback()
+      return True
+    except Exception:
+      return False
+
+  def _evict_idle(self):
+    # Oldest connections sit at the left end of the deque
+    now = time.monotonic()
+    while len(self._idle) > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+      conn, _ = self._idle.popleft()
+      self._discard(conn)
+
+  def _discard(self, conn):
+    self._open -= 1
+    self.discarded += 1
+    try:
+      conn.close()
+    except Exception:
+      pass
+
+  def closeAll(self):
+    with self._cond:
+      while self._idle:
+        conn, _ = self._idle.popleft()
+        self._discard(conn)
+
+  def stats(self):
+    with self._cond:
+      return {
+        "open": self._open,
+        "idle": len(self._idle),
+        "created": self.created,
+        "reused": self.reused,
+        "discarded": self.discarded,
+      }
+
+
 class DataBase():
+  # Connection pools are shared by every DataBase for the life of the process
+  POOL_MIN_SIZE = 1
+  POOL_MAX_SIZE = 4
+  POOL_IDLE_TIMEOUT = 300.0
+  _pools = {}
+  _pools_lock = threading.Lock()
+  # Names of the statements already prepared on each connection
+  _prepared = weakref.WeakKeyDictionary()
 
-  def __init__(self):
+  # Keeps a player's best score per level and the time it was reached.
+  # Needs unique(users.name) and unique(scores.user_id, scores.level),
+  # see migrations/001_unique_user_scores.sql and 004_single_scores_table.sql
+  KEEP_BEST_SQL = """
+    on conflict (user_id, level) do update
+      set score = greatest(scores.score, excluded.score),
+          achieved_at = case when excluded.score > scores.score
+                        then excluded.achieved_at else scores.achieved_at end
+  """
+  ADD_SCORE_SQL = """
+    prepare add_score (text, integer, integer) as
+    with player as (
+      insert into users(name) values ($1)
+      on conflict (name) do update set name = excluded.name
+      returning id
+    )
+    insert into scores(user_id, level, score)
+    select id, $2, $3 from player
+  """ + KEEP_BEST_SQL
+
+  def __init__(self, driver = None):
+    """
+    Arguments:
+        driver {module} -- DB-API driver, psycopg2 imported on first
+        connection when not given
+    """
+    self.driver = driver
     self.conn = None
     self.cursor = None
+    self.pool = None
     
   def addUser(self, userName):
-      self.cursor.execute(f"insert into users(name) values ('{userName}');")
+      self.cursor.execute("insert into users(name) values (%s);", (userName,))
       self.conn.commit()
 
+  def prepare(self, name, sql):
+    """Prepare a statement once per pooled connection"""
+    prepared = DataBase._prepared.setdefault(self.conn, set())
+    if name not in prepared:
+      self.cursor.execute(sql)
+      prepared.add(name)
+
   def addScore(self, userName, scores, level):
-    user_id = self.getUserIdByName(userName)
-    if (user_id == -1):
-      self.addUser(userName)
-    user_id = self.getUserIdByName(userName)
-    self.cursor.execute(f"select * from scores{level} as sc where sc.id_user = '{user_id}'")
-    records = self.cursor.fetchall()
-    if len(records) == 0:
-      self.cursor.execute(f"insert into scores{level}(id_user, score) VALUES ({user_id}, {scores});")
-    else:
-      if records[0][2] < scores:
-        self.cursor.execute(f"update scores{level} set score = {scores} where id_user = {user_id};")
+    """Create the user if needed and keep their best score, in one round trip"""
+    self.prepare("add_score", self.ADD_SCORE_SQL)
+    self.cursor.execute("execute add_score (%s, %s, %s)", (userName, int(level), int(scores)))
     self.conn.commit()
   
+  def addScores(self, rows):
+    """Store a batch of scores in one transaction, each one at most once
+    Keys already in score_submissions are skipped, so a batch whose reply
+    was lost can be sent again. Needs migrations/003_score_submissions.sql
+
+    Arguments:
+        rows {list} -- (key, userName, level, scores, achievedAt) tuples,
+        achievedAt in seconds since the epoch or None for now
+
+    Returns:
+        set -- Keys of the scores not seen before
+    """
+    if not rows:
+      return set()
+    self.cursor.execute(
+      "insert into score_submissions(key) values "
+      + ", ".join(["(%s)"] * len(rows))
+      + " on conflict (key) do nothing returning key",
+      [row[0] for row in rows])
+    fresh = {key for key, in self.cursor.fetchall()}
+
+    # A row can only be upserted once per statement, keep each player's
+    # best and the first time it was reached
+    best = {}
+    for key, userName, level, scores, achievedAt in rows:
+      if key in fresh:
+        slot = (userName, int(level))
+        if slot not in best or int(scores) > best[slot][0]:
+          best[slot] = (int(scores), achievedAt)
+    if best:
+      names = sorted({name for name, _ in best})
+      self.cursor.execute(
+        "insert into users(name) values "
+        + ", ".join(["(%s)"] * len(names))
+        + " on conflict (name) do nothing",
+        names)
+      self.cursor.execute(
+        "insert into scores(user_id, level, score, achieved_at)"
+        " select us.id, batch.level, batch.score,"
+        " coalesce(to_timestamp(batch.achieved_at::double precision), now()) from (values "
+        + ", ".join(["(%s, %s, %s, %s)"] * len(best))
+        + ") batch(name, level, score, achieved_at) join users us on us.name = batch.name"
+        + self.KEEP_BEST_SQL,
+        [value for (name, level), (score, achievedAt) in best.items()
+         for value in (name, level, score, achievedAt)])
+    self.conn.commit()
+    return fresh
+
   def getUserIdByName(self, userName):
-    self.cursor.execute(f"select us.id from users as us where us.name = '{userName}'")
+    self.cursor.execute("select us.id from users as us where us.name = %s", (userName,))
     records = self.cursor.fetchall()
     if len(records) == 0:
       return -1
@@ -32,16 +252,481 @@ class DataBase():
       return records[0][0]
 
   def getAllScores(self, level, num = 3):
-    self.cursor.execute(f"select us.name, sc.score from users us join scores{level} sc on sc.id_user = us.id order by sc.score DESC ")
-    records = self.cursor.fetchmany(size=num)
-    return records
+    return self.getTopScores([level], num)[int(level)]
+
+  def getTopScores(self, levels, num = 3):
+    """Return the best num (name, score) pairs of every level in one query
+    Each level is cut down with a limit on the (level, score desc) index
+    before the join, see migrations/004_single_scores_table.sql
+
+    Arguments:
+        levels {iterable} -- Level numbers
+        num {int} -- Rows per level
+    """
+    levels = sorted({int(level) for level in levels})
+    self.cursor.execute(
+      "select wanted.level, us.name, top.score"
+      " from unnest(%(levels)s::integer[]) as wanted(level)"
+      " cross join lateral ("
+      "  select user_id, score from scores"
+      "  where scores.level = wanted.level"
+      "  order by score desc limit %(num)s"
+      " ) top join users us on us.id = top.user_id"
+      " order by wanted.level, top.score desc",
+      {"levels": levels, "num": int(num)})
+    scores = {level: [] for level in levels}
+    for level, name, score in self.cursor.fetchall():
+      scores[level].append((name, score))
+    return scores
+
+  def getPool(self, host, user, password):
+    driver = self.driver or loadDriver()
+    key = (driver, host, user, password)
+    with DataBase._pools_lock:
+      pool = DataBase._pools.get(key)
+      if pool is None:
+        pool = ConnectionPool(
+          lambda: driver.connect(dbname='superman_survival', user=user,
+                        password=password, host=host),
+          min_size=self.POOL_MIN_SIZE,
+          max_size=self.POOL_MAX_SIZE,
+          idle_timeout=self.POOL_IDLE_TIMEOUT)
+        DataBase._pools[key] = pool
+    return pool
 
   def createConn(self,host = '37.195.213.170', user = 'user1', password = 'user'):
-    self.conn = psycopg2.connect(dbname='superman_survival', user=user, 
-                        password=password, host=host)
+    self.pool = self.getPool(host, user, password)
+    self.conn = self.pool.acquire()
     self.cursor = self.conn.cursor()
 
   def closeConn(self):
     self.cursor.close()
-    self.conn.close()
+    self.pool.release(self.conn)
+    self.conn = None
+    self.cursor = None
+
+
+class LeaderboardClient():
+  """Talks to leaderboard_service over HTTP with the methods of DataBase
+  Can stand in for DataBase anywhere, e.g. as ScoreSync's database_factory,
+  so clients share the service instead of each holding a database connection
+  """
+
+  def __init__(self, url = "http://127.0.0.1:8080", timeout = 5.0):
+    parts = urlsplit(url)
+    self.host = parts.hostname
+    self.port = parts.port or 80
+    self.timeout = timeout
+    self.conn = None
+
+  def createConn(self):
+    if self.conn is None:
+      self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+  def closeConn(self):
+    # The HTTP connection is kept alive for the next request
+    pass
+
+  def close(self):
+    if self.conn is not None:
+      self.conn.close()
+      self.conn = None
+
+  def _request(self, method, path, payload = None):
+    body = json.dumps(payload) if payload is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    for attempt in (0, 1):
+      self.createConn()
+      try:
+        self.conn.request(method, path, body=body, headers=headers)
+        response = self.conn.getresponse()
+        data = json.loads(response.read() or b"null")
+        break
+      except (http.client.HTTPException, ConnectionError):
+        # The server may have dropped an idle keep-alive connection
+        self.close()
+        if attempt:
+          raise
+    if response.status != 200:
+      raise RuntimeError(f"leaderboard service: {response.status} {data}")
+    return data
+
+  def addScore(self, userName, scores, level):
+    self.addScores([(uuid.uuid4().hex, userName, level, scores, time.time())])
+
+  def addScores(self, rows):
+    """Send (key, userName, level, scores, achievedAt) rows, return how many were new"""
+    if not rows:
+      return 0
+    return self._request("POST", "/scores", {"scores": [
+      {"key": key, "name": userName, "level": int(level), "score": int(scores),
+       "achieved_at": achievedAt}
+      for key, userName, level, scores, achievedAt in rows
+    ]})["stored"]
+
+  def getAllScores(self, level, num = 3):
+    return self.getTopScores([level], num)[int(level)]
+
+  def getTopScores(self, levels, num = 3):
+    levels = sorted({int(level) for level in levels})
+    query = urlencode({"levels": ",".join(map(str, levels)), "num": int(num)})
+    scores = self._request("GET", f"/scores?{query}")
+    return {level: [tuple(row) for row in scores.get(str(level), [])] for level in levels}
+
+
+class LeaderboardCache():
+  """Client-side cache of top-N lists keyed by (level, num)
+  Fresh entries are served without I/O. Entries older than ttl are still
+  served but refreshed in the background, until stale_ttl when they have
+  to be loaded again. Missing entries are loaded in the background too,
+  so get never waits on the loader. Stored scores patch the cached lists
+  in place
+  """
+
+  def __init__(self, loader, ttl = 30.0, stale_ttl = 600.0, max_entries = 32,
+               retry_after = 10.0):
+    """
+    Arguments:
+        loader {callable} -- Returns {level: [(name, score), ...]} for
+        (levels, num), e.g. LocalScoreStore.getTopScores, called on a
+        background thread
+        retry_after {float} -- Seconds before a failed load is tried again
+    """
+    self.loader = loader
+    self.ttl = ttl
+    self.stale_ttl = stale_ttl
+    self.max_entries = max_entries
+    self.retry_after = retry_after
+    self._entries = OrderedDict()
+    self._loading = set()
+    self._failed = {}
+    self._waiting = []
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+    self.last_error = None
+
+  def get(self, levels, num = 3, callback = None):
+    """Return {level: [(name, score), ...]} for the cached levels
+    Levels not cached yet are left out and loaded in the background
+
+    Arguments:
+        callback {callable} -- Called without arguments once a level
+        being loaded is stored or failed, from the loader thread
+    """
+    now = time.monotonic()
+    scores = {}
+    load = []
+    with self._lock:
+      for level in levels:
+        key = (int(level), num)
+        entry = self._entries.get(key)
+        if entry is None or now - entry[0] > self.stale_ttl:
+          self.misses += 1
+          failed_at = self._failed.get(key)
+          if key not in self._loading and (failed_at is None or now - failed_at >= self.retry_after):
+            self._loading.add(key)
+            load.append(key[0])
+          continue
+        self._entries.move_to_end(key)
+        self.hits += 1
+        scores[key[0]] = list(entry[1])
+        if now - entry[0] > self.ttl and key not in self._loading:
+          self._loading.add(key)
+          load.append(key[0])
+      if callback is not None and any((int(level), num) in self._loading for level in levels):
+        self._waiting.append(callback)
+
+    if load:
+      threading.Thread(target=self._load, args=(load, num), daemon=True).start()
+    return scores
+
+  def loading(self, level, num = 3):
+    """Whether the list of a level is being loaded"""
+    with self._lock:
+      return (int(level), num) in self._loading
+
+  def _load(self, levels, num):
+    keys = [(level, num) for level in levels]
+    try:
+      self.store(self.loader(levels, num), num)
+    except Exception as error:
+      with self._lock:
+        self.last_error = error
+        for key in keys:
+          self._failed[key] = time.monotonic()
+    finally:
+      with self._lock:
+        self._loading.difference_update(keys)
+        waiting, self._waiting = self._waiting, []
+      for callback in waiting:
+        callback()
+
+  def store(self, scores, num = 3):
+    """Cache freshly loaded lists, replacing the ones of the same levels
+
+    Arguments:
+        scores {dict} -- {level: [(name, score), ...]}
+    """
+    now = time.monotonic()
+    with self._lock:
+      for level, rows in scores.items():
+        key = (level, num)
+        self._entries[key] = (now, list(rows))
+        self._entries.move_to_end(key)
+        self._failed.pop(key, None)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def recordScore(self, userName, scores, level):
+    """Patch the cached lists of a level after a score was stored"""
+    level = int(level)
+    with self._lock:
+      for (entry_level, num), (loaded, rows) in self._entries.items():
+        if entry_level != level:
+          continue
+        for place, (name, score) in enumerate(rows):
+          if name == userName:
+            if score < scores:
+              rows[place] = (name, scores)
+            break
+        else:
+          if len(rows) < num or scores > rows[-1][1]:
+            rows.append((userName, scores))
+        rows.sort(key=lambda row: row[1], reverse=True)
+        del rows[num:]
+
+  def invalidate(self, level = None):
+    with self._lock:
+      for key in list(self._entries):
+        if level is None or key[0] == int(level):
+          del self._entries[key]
+
+
+class LocalScoreStore():
+  """Embedded SQLite store every score is written to first
+  Scores stay pending until the sync engine has uploaded them, and the
+  last leaderboard pulled from the server is kept next to them, so the
+  game keeps working without a network
+  """
+
+  SCHEMA = """
+    create table if not exists scores (
+      key text primary key,
+      name text not null,
+      level integer not null,
+      score integer not null,
+      achieved_at real not null,
+      synced integer not null default 0
+    );
+    create index if not exists scores_pending on scores(synced) where synced = 0;
+    create index if not exists scores_level on scores(level, score desc);
+    create table if not exists leaderboard (
+      level integer not null,
+      place integer not null,
+      name text not null,
+      score integer not null,
+      primary key (level, place)
+    );
+  """
+
+  def __init__(self, path):
+    """
+    Arguments:
+        path {str} -- SQLite file, created with its directory on first use
+    """
+    self.path = path
+    self._lock = threading.Lock()
+    self.conn = None
+
+  def _connection(self):
+    # Opened on first use, so importing the game touches no file.
+    # Called with the lock held
+    if self.conn is None:
+      directory = os.path.dirname(self.path)
+      if directory:
+        os.makedirs(directory, exist_ok=True)
+      conn = sqlite3.connect(self.path, check_same_thread=False)
+      # WAL lets the sync thread read while the game writes; NORMAL
+      # syncs at checkpoints instead of on every commit
+      conn.execute("pragma journal_mode=wal")
+      conn.execute("pragma synchronous=normal")
+      conn.executescript(self.SCHEMA)
+      self.conn = conn
+    return self.conn
+
+  def addScore(self, userName, scores, level):
+    """Record a score locally and return its idempotency key"""
+    key = uuid.uuid4().hex
+    with self._lock, self._connection() as conn:
+      conn.execute(
+        "insert into scores(key, name, level, score, achieved_at) values (?, ?, ?, ?, ?)",
+        (key, userName, int(level), int(scores), time.time()))
+    return key
+
+  def pending(self, limit = 100):
+    """Return up to limit unsynced (key, userName, level, scores, achievedAt),
+    oldest first
+    """
+    with self._lock:
+      return self._connection().execute(
+        "select key, name, level, score, achieved_at from scores"
+        " where synced = 0 order by rowid limit ?",
+        (limit,)).fetchall()
+
+  def markSynced(self, keys):
+    with self._lock, self._connection() as conn:
+      conn.executemany("update scores set synced = 1 where key = ?", [(key,) for key in keys])
+
+  def storeLeaderboard(self, scores):
+    """Replace the pulled top lists of the given levels
+
+    Arguments:
+        scores {dict} -- {level: [(name, score), ...]}
+    """
+    with self._lock, self._connection() as conn:
+      for level, rows in scores.items():
+        conn.execute("delete from leaderboard where level = ?", (int(level),))
+        conn.executemany(
+          "insert into leaderboard(level, place, name, score) values (?, ?, ?, ?)",
+          [(int(level), place, name, score) for place, (name, score) in enumerate(rows)])
+
+  def getTopScores(self, levels, num = 3):
+    """Top num (name, score) of every level, the pulled leaderboard merged
+    with the scores recorded on this machine
+    """
+    top = {}
+    with self._lock:
+      conn = self._connection()
+      for level in sorted({int(level) for level in levels}):
+        top[level] = conn.execute(
+          "select name, max(score) as best from ("
+          " select name, score from leaderboard where level = ?"
+          " union all select name, score from scores where level = ?"
+          ") group by name order by best desc, name limit ?",
+          (level, level, int(num))).fetchall()
+    return top
+
+  def close(self):
+    with self._lock:
+      if self.conn is not None:
+        self.conn.close()
+        self.conn = None
+
+
+class ScoreSync():
+  """Keeps a LocalScoreStore and the server in step from a background thread
+  Pending scores are uploaded in batches with their idempotency keys and
+  the leaderboard is pulled every pull_interval. Failures only delay the
+  next attempt, the scores wait in the local store
+  """
+
+  def __init__(self, store, database_factory = DataBase, levels = (), num = 3,
+               batch_size = 100, pull_interval = 60.0, backoff = 2.0, max_backoff = 300.0,
+               leaderboard = None):
+    """
+    Arguments:
+        store {LocalScoreStore} -- Where scores are recorded first
+        levels {iterable} -- Levels whose leaderboard is pulled
+        num {int} -- Rows pulled per level
+        leaderboard {LeaderboardCache} -- Patched and refreshed on changes
+    """
+    self.store = store
+    self.database_factory = database_factory
+    self.levels = tuple(levels)
+    self.num = num
+    self.batch_size = batch_size
+    self.pull_interval = pull_interval
+    self.backoff = backoff
+    self.max_backoff = max_backoff
+    self.leaderboard = leaderboard
+    self.pushed = 0
+    self.failures = 0
+    self.last_error = None
+    self._wake = threading.Event()
+    self._stop = threading.Event()
+    self._thread = None
+    self._lock = threading.Lock()
+    self._next_pull = 0.0
+
+  def submit(self, userName, scores, level, callback = None):
+    """Record a score locally and return an already resolved Future
+    The upload happens later on the sync thread
+    """
+    future = Future()
+    if callback is not None:
+      future.add_done_callback(callback)
+    try:
+      self.store.addScore(userName, scores, level)
+    except Exception as error:
+      future.set_exception(error)
+      return future
+    if self.leaderboard is not None:
+      self.leaderboard.recordScore(userName, scores, level)
+    future.set_result(True)
+    self.start()
+    self._wake.set()
+    return future
+
+  def start(self):
+    with self._lock:
+      if self._thread is None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="score-sync", daemon=True)
+        self._thread.start()
+
+  def _run(self):
+    database = self.database_factory()
+    while not self._stop.is_set():
+      self._wake.clear()
+      try:
+        self.push(database)
+        if time.monotonic() >= self._next_pull:
+          self.pull(database)
+      except Exception as error:
+        self.last_error = error
+        self.failures += 1
+        wait = min(self.max_backoff, self.backoff * 2 ** (self.failures - 1))
+      else:
+        self.failures = 0
+        wait = max(0.0, self._next_pull - time.monotonic())
+      self._wake.wait(wait)
+
+  def push(self, database):
+    """Upload every pending score, batch_size per transaction"""
+    while True:
+      batch = self.store.pending(self.batch_size)
+      if not batch:
+        return
+      database.createConn()
+      try:
+        database.addScores(batch)
+      finally:
+        database.closeConn()
+      self.store.markSynced([row[0] for row in batch])
+      self.pushed += len(batch)
+
+  def pull(self, database):
+    """Refresh the local copy of the leaderboard"""
+    if self.levels:
+      database.createConn()
+      try:
+        scores = database.getTopScores(self.levels, self.num)
+      finally:
+        database.closeConn()
+      self.store.storeLeaderboard(scores)
+      if self.leaderboard is not None:
+        # Swap the new lists in rather than dropping the cached ones, which
+        # would show the leaderboard as loading until it is read again
+        self.leaderboard.store(self.store.getTopScores(self.levels, self.num), self.num)
+    self._next_pull = time.monotonic() + self.pull_interval
 
+  def close(self, timeout = None):
+    """Stop the sync thread, pending scores stay in the store"""
+    with self._lock:
+      thread = self._thread
+      self._thread = None
+    if thread is not None:
+      self._stop.set()
+      self._wake.set()
+      thread.join(timeout)
@@ -0,0 +1,56 @@
+import arcade
+
+
+class HudField():
+    """One line of HUD text that is only laid out again when its value changes"""
+
+    def __init__(self, template, x, y, **text_options):
+        """
+        Arguments:
+            template {str} -- Format string receiving the value, e.g. "FPS {:.0f}"
+            x, y {float} -- Anchor position of the text
+            text_options -- Extra arcade.Text arguments (color, font_size...)
+        """
+        self.template = template
+        self.x = x
+        self.y = y
+        self.text_options = text_options
+        self.value = None
+        self.text = None
+        self.dirty = True
+
+    def set(self, value):
+        if value != self.value:
+            self.value = value
+            self.dirty = True
+
+    def draw(self):
+        if self.dirty:
+            content = self.template.format(self.value)
+            if self.text is None:
+                # Built on first draw so headless runs never create a label
+                self.text = arcade.Text(content, self.x, self.y, **self.text_options)
+            else:
+                self.text.text = content
+            self.dirty = False
+        self.text.draw()
+
+
+class Hud():
+    """Named HUD fields drawn with persistent arcade.Text objects"""
+
+    def __init__(self):
+        self.fields = {}
+
+    def add(self, name, template, x, y, value=None, **text_options):
+        field = HudField(template, x, y, **text_options)
+        field.set(value)
+        self.fields[name] = field
+        return field
+
+    def set(self, name, value):
+        self.fields[name].set(value)
+
+    def draw(self):
+        for field in self.fields.values():
+            field.draw()
@@ -0,0 +1,369 @@
+"""Asyncio HTTP leaderboard service
+
+Fronts the scores schema so game clients no longer each hold a database
+connection. Score writes are grouped: every write waits for the next
+batch to commit, and one batch is one DataBase.addScores transaction.
+Top-N reads are answered from an in-memory sorted index without I/O.
+
+    GET  /scores?levels=1,2,3&num=3  -> {"1": [["name", 120], ...], ...}
+    POST /scores  {"scores": [{"key": "...", "name": "...", "level": 1, "score": 120,
+                               "achieved_at": 1700000000.0}]}
+    GET  /health
+
+Run it against Postgres, or against a local SQLite stand-in for testing:
+
+    python leaderboard_service.py --port 8080
+    python leaderboard_service.py --port 8080 --sqlite leaderboard.sqlite3
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import database as db
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+# Largest request body accepted, a batch of a few thousand scores
+MAX_BODY = 1 << 20
+
+
+class ScoreIndex():
+    """Best score of every player per level, kept sorted for top-N reads"""
+
+    def __init__(self):
+        self._best = {}
+        # (-score, name) per level, so the best scores come first
+        self._ranking = {}
+
+    def update(self, name, level, score):
+        """Keep score if it beats the player's best, return whether it did"""
+        best = self._best.setdefault(level, {})
+        ranking = self._ranking.setdefault(level, [])
+        old = best.get(name)
+        if old is not None:
+            if score <= old:
+                return False
+            del ranking[bisect.bisect_left(ranking, (-old, name))]
+        best[name] = score
+        bisect.insort(ranking, (-score, name))
+        return True
+
+    def top(self, level, num):
+        return [(name, -score) for score, name in self._ranking.get(level, ())[:num]]
+
+    def __len__(self):
+        return sum(len(best) for best in self._best.values())
+
+
+class SqliteBackend():
+    """Local stand-in for Postgres with the same tables and semantics
+    users, scores(user_id, level, score, achieved_at) unique per user and
+    level, and score_submissions for idempotency keys
+    """
+
+    SCHEMA = """
+        create table if not exists users (
+            id integer primary key,
+            name text not null unique
+        );
+        create table if not exists scores (
+            id integer primary key,
+            user_id integer not null references users(id),
+            level integer not null,
+            score integer not null,
+            achieved_at text not null default current_timestamp,
+            unique (user_id, level)
+        );
+        create index if not exists scores_level_score_idx on scores (level, score desc, user_id);
+        create table if not exists score_submissions (
+            key text primary key,
+            received_at text not null default current_timestamp
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("pragma journal_mode=wal")
+        self.conn.execute("pragma synchronous=normal")
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    def addScores(self, rows):
+        """Store (key, userName, level, scores, achievedAt) rows in one transaction
+
+        Returns:
+            set -- Keys not seen before
+        """
+        fresh = set()
+        with self._lock, self.conn:
+            for row in rows:
+                key, userName, level, scores, achievedAt = row
+                inserted = self.conn.execute(
+                    "insert into score_submissions(key) values (?) on conflict (key) do nothing",
+                    (key,))
+                if not inserted.rowcount:
+                    continue
+                fresh.add(key)
+                self.conn.execute(
+                    "insert into users(name) values (?) on conflict (name) do nothing", (userName,))
+                self.conn.execute(
+                    "insert into scores(user_id, level, score, achieved_at)"
+                    " select id, ?, ?, datetime(?, 'unixepoch') from users where name = ?"
+                    " on conflict (user_id, level) do update"
+                    " set score = max(score, excluded.score),"
+                    " achieved_at = case when excluded.score > score"
+                    " then excluded.achieved_at else achieved_at end",
+                    (int(level), int(scores), achievedAt, userName))
+        return fresh
+
+    def loadIndex(self):
+        """Return every (name, level, score) to build the index from"""
+        with self._lock:
+            return self.conn.execute(
+                "select us.name, s.level, s.score from scores s join users us on us.id = s.user_id"
+            ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+class PostgresBackend():
+    """Writes through DataBase.addScores on the shared connection pool
+
+    Arguments:
+        levels {iterable} -- Levels loaded into the index at startup
+        index_size {int} -- Best scores per level loaded into the index
+    """
+
+    def __init__(self, levels, index_size=1000, **conn_args):
+        self.levels = tuple(levels)
+        self.index_size = index_size
+        self.conn_args = conn_args
+        self.database = db.DataBase()
+
+    def addScores(self, rows):
+        self.database.createConn(**self.conn_args)
+        try:
+            return self.database.addScores(rows)
+        finally:
+            self.database.closeConn()
+
+    def loadIndex(self):
+        self.database.createConn(**self.conn_args)
+        try:
+            scores = self.database.getTopScores(self.levels, self.index_size)
+        finally:
+            self.database.closeConn()
+        return [(name, level, score) for level, rows in scores.items() for name, score in rows]
+
+    def close(self):
+        pass
+
+
+class LeaderboardService():
+    """HTTP front of a backend with batched writes and an in-memory index"""
+
+    def __init__(self, backend, batch_size=500, batch_delay=0.005):
+        """
+        Arguments:
+            backend -- SqliteBackend or PostgresBackend
+            batch_size {int} -- Most scores written per transaction
+            batch_delay {float} -- Seconds a batch waits for more writes
+        """
+        self.backend = backend
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.index = ScoreIndex()
+        self._pending = []
+        self._wake = None
+        self._flusher = None
+        # The backend is blocking and not safe for concurrent batches
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="leaderboard-writer")
+        self.requests = 0
+        self.batches = 0
+        self.written = 0
+
+    async def start(self, host="127.0.0.1", port=8080):
+        loop = asyncio.get_running_loop()
+        for name, level, score in await loop.run_in_executor(self._executor, self.backend.loadIndex):
+            self.index.update(name, int(level), int(score))
+        self._wake = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_forever())
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._flusher.cancel()
+        self._executor.shutdown()
+
+    async def submit(self, rows):
+        """Queue rows for the next batch and wait until it is committed
+
+        Returns:
+            int -- Rows that were new, the others were resubmissions
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((rows, future))
+        self._wake.set()
+        return await future
+
+    async def _flush_forever(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wake.wait()
+            # Let concurrent writes join the batch before it is sent
+            await asyncio.sleep(self.batch_delay)
+            self._wake.clear()
+            waiting, rows = [], []
+            while self._pending and len(rows) < self.batch_size:
+                entry = self._pending.pop(0)
+                waiting.append(entry)
+                rows.extend(entry[0])
+            if self._pending:
+                self._wake.set()
+            try:
+                fresh = await loop.run_in_executor(self._executor, self.backend.addScores, rows)
+            except Exception as error:
+                for _, future in waiting:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.batches += 1
+            self.written += len(fresh)
+            for key, name, level, score, _ in rows:
+                if key in fresh:
+                    self.index.update(name, level, score)
+            for entry_rows, future in waiting:
+                if not future.done():
+                    future.set_result(len({row[0] for row in entry_rows} & fresh))
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": "request body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.route(method, target, body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, target, body):
+        """Answer one request
+
+        Returns:
+            (status, payload) -- HTTP status and JSON-serializable body
+        """
+        self.requests += 1
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, {"ok": True, "indexed": len(self.index), "pending": len(self._pending)}
+        if url.path != "/scores":
+            return 404, {"error": "not found"}
+
+        if method == "GET":
+            query = parse_qs(url.query)
+            try:
+                levels = [int(level) for level in query.get("levels", [""])[0].split(",") if level]
+                num = int(query.get("num", ["3"])[0])
+            except ValueError:
+                return 400, {"error": "levels and num must be integers"}
+            return 200, {str(level): self.index.top(level, num) for level in levels}
+
+        if method == "POST":
+            try:
+                scores = json.loads(body)["scores"]
+                # Scores sent without the time they were reached date from now
+                received = time.time()
+                rows = [
+                    (str(score.get("key") or uuid.uuid4().hex), str(score["name"]),
+                     int(score["level"]), int(score["score"]),
+                     float(score.get("achieved_at") or received))
+                    for score in scores
+                ]
+            except (ValueError, KeyError, TypeError, AttributeError):
+                return 400, {"error": "expected {\"scores\": [{name, level, score, key, achieved_at}]}"}
+            try:
+                stored = await self.submit(rows)
+            except Exception as error:
+                return 503, {"error": f"could not store scores: {error}"}
+            return 200, {"stored": stored}
+
+        return 405, {"error": "method not allowed"}
+
+
+async def serve(service, host, port):
+    server = await service.start(host, port)
+    print(f"leaderboard service on http://{host}:{port}, {len(service.index)} scores indexed")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--sqlite", help="use a local SQLite file instead of Postgres")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 3],
+                        help="levels indexed at startup from Postgres")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--batch-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    if args.sqlite:
+        backend = SqliteBackend(os.path.abspath(args.sqlite))
+    else:
+        backend = PostgresBackend(args.levels)
+    service = LeaderboardService(backend, args.batch_size, args.batch_delay)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Level definitions loaded from levels.json
+
+Every level is described by data: background, enemy pool size, a
+piecewise-linear enemy velocity curve and spawn waves whose interval can
+ramp from one value to another. Definitions are validated and compiled
+once at import into spawn timetables, so a running level only looks up
+the next spawn time by index.
+
+Check a definitions file without starting the game:
+
+    python levels.py levels.json
+"""
+import bisect
+import json
+import math
+import os
+import sys
+from dataclasses import dataclass
+
+
+class LevelError(ValueError):
+    """A level definition is malformed"""
+
+
+@dataclass
+class LevelDefinition():
+    level: int
+    background: str
+    pool_size: int
+    # (time, horizontal velocity) keyframes, interpolated linearly
+    velocity: tuple
+    # Precomputed spawn times in seconds from the level start
+    spawn_times: tuple
+    # Interval used past the last precomputed spawn, None if spawning stops
+    final_interval: float = None
+
+    def velocity_at(self, time):
+        """Return the (x, y) enemy velocity at a time since the level start"""
+        keys = self.velocity
+        index = bisect.bisect_right(self._key_times, time)
+        if index == 0:
+            return (keys[0][1], 0)
+        if index == len(keys):
+            return (keys[-1][1], 0)
+        (start, first), (end, last) = keys[index - 1], keys[index]
+        return (first + (last - first) * (time - start) / (end - start), 0)
+
+    def spawn_time(self, index):
+        """Return the time of the index-th spawn, inf when there is none"""
+        if index < len(self.spawn_times):
+            return self.spawn_times[index]
+        if self.final_interval is None or not self.spawn_times:
+            return math.inf
+        extra = index - len(self.spawn_times) + 1
+        return self.spawn_times[-1] + extra * self.final_interval
+
+    def __post_init__(self):
+        self._key_times = [time for time, _ in self.velocity]
+
+
+def _number(value, where, minimum=None, strict=False):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise LevelError(f"{where}: expected a number, got {value!r}")
+    if minimum is not None and (value < minimum or (strict and value == minimum)):
+        bound = ">" if strict else ">="
+        raise LevelError(f"{where}: must be {bound} {minimum}, got {value!r}")
+    return value
+
+
+# Spawn times this close past the end of a wave still belong to it
+_TIME_TOLERANCE = 1e-9
+
+
+def _wave_times(start, end, first, last):
+    """Spawn times of one wave, the interval ramping linearly from first to last
+    Each spawn waits the interval due at the previous one, so the i-th
+    spawn comes after a geometric sum of intervals. Every time is computed
+    from its index rather than by adding intervals, which would drift
+    """
+    if end <= start:
+        return []
+    # Growth of the interval per second into the wave
+    ramp = (last - first) / (end - start)
+    times = []
+    index = 1
+    while True:
+        if ramp == 0:
+            offset = index * first
+        else:
+            offset = first * ((1 + ramp) ** index - 1) / ramp
+        time = start + offset
+        if time > end + _TIME_TOLERANCE:
+            return times
+        times.append(time)
+        index += 1
+
+
+def compile_level(data, duration, where):
+    """Validate one level entry and build its LevelDefinition"""
+    if not isinstance(data, dict):
+        raise LevelError(f"{where}: expected an object")
+    for key in ("level", "background", "pool_size", "velocity", "waves"):
+        if key not in data:
+            raise LevelError(f"{where}: missing {key!r}")
+
+    level = data["level"]
+    if isinstance(level, bool) or not isinstance(level, int) or level < 1:
+        raise LevelError(f"{where}.level: expected a positive integer, got {level!r}")
+    if not isinstance(data["background"], str):
+        raise LevelError(f"{where}.background: expected a path")
+    pool_size = data["pool_size"]
+    if isinstance(pool_size, bool) or not isinstance(pool_size, int) or pool_size < 1:
+        raise LevelError(f"{where}.pool_size: expected a positive integer, got {pool_size!r}")
+
+    velocity = data["velocity"]
+    if not isinstance(velocity, list) or not velocity:
+        raise LevelError(f"{where}.velocity: expected a list of [time, velocity] pairs")
+    keys = []
+    for number, key in enumerate(velocity):
+        key_where = f"{where}.velocity[{number}]"
+        if not isinstance(key, list) or len(key) != 2:
+            raise LevelError(f"{key_where}: expected [time, velocity]")
+        time = _number(key[0], key_where, minimum=0)
+        speed = _number(key[1], key_where)
+        if speed >= 0:
+            raise LevelError(f"{key_where}: enemies fly left, velocity must be negative")
+        if keys and time <= keys[-1][0]:
+            raise LevelError(f"{key_where}: keyframe times must increase")
+        keys.append((float(time), float(speed)))
+
+    waves = data["waves"]
+    if not isinstance(waves, list) or not waves:
+        raise LevelError(f"{where}.waves: expected a non-empty list")
+    times = []
+    final_interval = None
+    for number, wave in enumerate(waves):
+        wave_where = f"{where}.waves[{number}]"
+        if not isinstance(wave, dict) or "start" not in wave or "interval" not in wave:
+            raise LevelError(f"{wave_where}: expected an object with start and interval")
+        start = _number(wave["start"], f"{wave_where}.start", minimum=0)
+        end = wave.get("end")
+        if end is not None:
+            end = _number(end, f"{wave_where}.end", minimum=start, strict=True)
+        interval = wave["interval"]
+        if isinstance(interval, list):
+            if len(interval) != 2:
+                raise LevelError(f"{wave_where}.interval: expected [from, to]")
+            first, last = interval
+        else:
+            first = last = interval
+        first = _number(first, f"{wave_where}.interval", minimum=0, strict=True)
+        last = _number(last, f"{wave_where}.interval", minimum=0, strict=True)
+
+        wave_end = min(end, duration) if end is not None else duration
+        times.extend(_wave_times(float(start), float(wave_end), float(first), float(last)))
+        if end is None:
+            final_interval = float(last)
+
+    times.sort()
+    return LevelDefinition(
+        level=level,
+        background=data["background"],
+        pool_size=pool_size,
+        velocity=tuple(keys),
+        spawn_times=tuple(times),
+        final_interval=final_interval,
+    )
+
+
+def load_levels(path):
+    """Load, validate and compile every level of a definitions file
+
+    Returns:
+        dict -- LevelDefinition by level number
+    """
+    try:
+        with open(path, encoding="utf-8") as levels_file:
+            data = json.load(levels_file)
+    except (OSError, json.JSONDecodeError) as error:
+        raise LevelError(f"{path}: {error}") from error
+    if not isinstance(data, dict) or not isinstance(data.get("levels"), list):
+        raise LevelError(f"{path}: expected an object with a 'levels' list")
+
+    duration = _number(data.get("duration", 600), f"{path}: duration", minimum=0, strict=True)
+    definitions = {}
+    for number, entry in enumerate(data["levels"]):
+        definition = compile_level(entry, float(duration), f"{path}: levels[{number}]")
+        if definition.level in definitions:
+            raise LevelError(f"{path}: level {definition.level} is defined twice")
+        definitions[definition.level] = definition
+    return dict(sorted(definitions.items()))
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "levels.json")
+    try:
+        definitions = load_levels(path)
+    except LevelError as error:
+        sys.exit(f"invalid: {error}")
+    for definition in definitions.values():
+        print(f"level {definition.level}: {len(definition.spawn_times)} spawns, "
+              f"pool {definition.pool_size}, velocity {definition.velocity[0][1]:g}")
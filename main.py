@@ -1,3 +1,5 @@
+# Imported first so the startup timer also covers the game's imports
+from startup import STARTUP
 import arcade_game as ag
 
 
@@ -8,10 +10,12 @@ SCREEN_TITLE = "Arcade Superman"
 SCALING = 2.0
 
 
+STARTUP.mark("import")
 # Create a new Space Shooter window
 window = ag.arcade.Window(int(SCREEN_WIDTH * SCALING), int(SCREEN_HEIGHT * SCALING), SCREEN_TITLE)
-main_menu = ag.MainMenu(SCALING)
-window.show_view(main_menu)
+STARTUP.mark("window")
+splash = ag.SplashView(SCALING)
+window.show_view(splash)
 # Setup to play
 # Run the game
 
@@ -0,0 +1,97 @@
+"""Apply the SQL files of migrations/ that a database has not run yet
+
+Applied files are recorded by name in schema_migrations. Every file
+manages its own transaction, so the tool runs in autocommit mode.
+
+    python migrate.py                 # apply pending migrations
+    python migrate.py --list          # show applied and pending migrations
+    python migrate.py --baseline 003  # record 001-003 as applied without
+                                      # running them, for a database that
+                                      # was migrated by hand
+"""
+import argparse
+import os
+import sys
+
+import psycopg2
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def available():
+    """Return the migration file names in the order they must run"""
+    return sorted(name for name in os.listdir(MIGRATIONS_DIR) if name.endswith(".sql"))
+
+
+def applied(cursor):
+    cursor.execute(
+        "create table if not exists schema_migrations ("
+        " name text primary key,"
+        " applied_at timestamptz not null default now())"
+    )
+    cursor.execute("select name from schema_migrations")
+    return {name for name, in cursor.fetchall()}
+
+
+def record(cursor, name):
+    cursor.execute("insert into schema_migrations(name) values (%s) on conflict do nothing", (name,))
+
+
+def migrate(conn, baseline=None, out=sys.stdout):
+    """Run every pending migration in order
+
+    Arguments:
+        conn -- DB-API connection in autocommit mode
+        baseline {str} -- Record migrations up to this prefix as applied
+        instead of running them
+
+    Returns:
+        list -- Names of the migrations that ran
+    """
+    cursor = conn.cursor()
+    done = applied(cursor)
+    ran = []
+    for name in available():
+        if name in done:
+            continue
+        if baseline is not None and name[:len(baseline)] <= baseline:
+            record(cursor, name)
+            print(f"baseline {name}", file=out)
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, name), encoding="utf-8") as sql_file:
+            sql = sql_file.read()
+        print(f"applying {name}", file=out)
+        cursor.execute(sql)
+        record(cursor, name)
+        ran.append(name)
+    cursor.close()
+    return ran
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="37.195.213.170")
+    parser.add_argument("--user", default="user1")
+    parser.add_argument("--password", default="user")
+    parser.add_argument("--dbname", default="superman_survival")
+    parser.add_argument("--list", action="store_true", help="show migrations and exit")
+    parser.add_argument("--baseline", help="record migrations up to this number as applied")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(dbname=args.dbname, user=args.user,
+                            password=args.password, host=args.host)
+    conn.autocommit = True
+    try:
+        if args.list:
+            done = applied(conn.cursor())
+            for name in available():
+                print(f"{'applied' if name in done else 'pending'}  {name}")
+            return
+        ran = migrate(conn, baseline=args.baseline)
+        print(f"{len(ran)} migration(s) applied")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
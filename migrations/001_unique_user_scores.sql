@@ -0,0 +1,20 @@
+-- DataBase.addScore upserts the player and their best score in one
+-- statement (insert ... on conflict ... greatest), which needs a unique
+-- player name and at most one score row per player and level.
+
+begin;
+
+-- Keep the best score when a player already has several rows
+delete from scores1 a using scores1 b
+  where a.id_user = b.id_user and (a.score, a.id) < (b.score, b.id);
+delete from scores2 a using scores2 b
+  where a.id_user = b.id_user and (a.score, a.id) < (b.score, b.id);
+delete from scores3 a using scores3 b
+  where a.id_user = b.id_user and (a.score, a.id) < (b.score, b.id);
+
+alter table users add constraint users_name_key unique (name);
+alter table scores1 add constraint scores1_id_user_key unique (id_user);
+alter table scores2 add constraint scores2_id_user_key unique (id_user);
+alter table scores3 add constraint scores3_id_user_key unique (id_user);
+
+commit;
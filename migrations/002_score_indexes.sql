@@ -0,0 +1,7 @@
+-- DataBase.getTopScores reads the top rows of every scores{level} table
+-- with "order by score desc limit n". These indexes turn each branch into
+-- a short index scan; id_user is included so the join needs no heap read.
+
+create index if not exists scores1_score_idx on scores1 (score desc, id_user);
+create index if not exists scores2_score_idx on scores2 (score desc, id_user);
+create index if not exists scores3_score_idx on scores3 (score desc, id_user);
@@ -0,0 +1,12 @@
+-- DataBase.addScores uploads batches of scores recorded offline. Every
+-- score carries a client-generated key, and a key already listed here
+-- was applied before, so a batch can be resent safely.
+
+begin;
+
+create table if not exists score_submissions (
+  key text primary key,
+  received_at timestamptz not null default now()
+);
+
+commit;
@@ -0,0 +1,40 @@
+-- One scores table for every level replaces the scores{level} tables, so
+-- a new level needs no DDL and the leaderboard of several levels is one
+-- index-backed query. Rows of every scores<N> table are copied over in
+-- bulk; the old tables are left in place and can be dropped once no
+-- client of an older version writes to them.
+
+begin;
+
+create table if not exists scores (
+  id serial primary key,
+  user_id integer not null references users(id),
+  level integer not null check (level > 0),
+  score integer not null,
+  achieved_at timestamptz not null default now(),
+  constraint scores_user_id_level_key unique (user_id, level)
+);
+
+-- Top-N of a level is a short scan of this index; user_id is included so
+-- the join to users needs no heap read
+create index if not exists scores_level_score_idx on scores (level, score desc, user_id);
+
+do $$
+declare
+  legacy record;
+begin
+  for legacy in
+    select table_name, substring(table_name from '^scores([0-9]+)$')::integer as level
+    from information_schema.tables
+    where table_schema = current_schema() and table_name ~ '^scores[0-9]+$'
+  loop
+    execute format(
+      'insert into scores (user_id, level, score) '
+      'select id_user, %s, max(score) from %I group by id_user '
+      'on conflict (user_id, level) do update set score = greatest(scores.score, excluded.score)',
+      legacy.level, legacy.table_name);
+  end loop;
+end
+$$;
+
+commit;
@@ -0,0 +1,184 @@
+import math
+
+# NumPy costs ~100 ms to import, so it is loaded by load_numpy on first
+# use or during the splash screen rather than at startup
+np = None
+_numpy_loaded = False
+
+
+def load_numpy():
+    """Import NumPy once and return it, or None when it is not installed"""
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+        _numpy_loaded = True
+    return np
+
+
+class MovementKernel():
+    """Batched positions of pooled enemies
+    Every enemy flies at the shared velocity, so it sits where it spawned
+    relative to the level's scroll offset. The kernel keeps those spawn
+    positions of every pool slot in one NumPy array and turns them into
+    sprite positions for a whole frame at once
+    """
+
+    def __init__(self, capacity):
+        """Allocate the arrays for every slot of the enemy pool
+
+        Arguments:
+            capacity {int} -- Number of slots, one per pooled enemy
+        """
+        self.home = np.zeros((capacity, 2))
+        self.active = np.zeros(capacity, dtype=bool)
+
+    def activate(self, slot, home):
+        """Track a freshly spawned enemy
+
+        Arguments:
+            slot {int} -- Pool slot of the enemy
+            home {tuple} -- Center of the enemy relative to the scroll offset
+        """
+        self.home[slot] = home
+        self.active[slot] = True
+
+    def deactivate(self, slot):
+        self.active[slot] = False
+
+    def positions(self, offset):
+        """Return the active slots and their (n, 2) centers at a scroll offset"""
+        slots = np.flatnonzero(self.active)
+        position = self.home[slots]
+        position[:, 0] += offset
+        return slots, position
+
+    def sync(self, sprites, offset):
+        """Move the sprites of every active slot to their current position
+
+        Arguments:
+            sprites {list} -- Sprites indexed by pool slot
+            offset {float} -- Scroll offset shared by every enemy
+        """
+        slots, position = self.positions(offset)
+        for slot, (x, y) in zip(slots.tolist(), position.tolist()):
+            sprites[slot].position = (x, y)
+
+
+class ScrollingSpatialHash():
+    """Uniform-grid broad phase for enemies that share one horizontal velocity
+    Enemies are bucketed by their position relative to a common scroll
+    offset. Since they all move together, a frame of movement only shifts
+    the offset and the grid itself is touched on spawn and recycle only
+    """
+
+    def __init__(self, cell_size):
+        """Create an empty grid
+
+        Arguments:
+            cell_size {float} -- Width and height of a grid cell in pixels
+        """
+        self.cell_size = cell_size
+        self.offset = 0
+        self._cells = {}
+        self._cells_of = {}
+
+    def _cell_range(self, left, right, bottom, top):
+        size = self.cell_size
+        for cell_x in range(int(left // size), int(right // size) + 1):
+            for cell_y in range(int(bottom // size), int(top // size) + 1):
+                yield cell_x, cell_y
+
+    def insert(self, sprite):
+        """Add an enemy at its current position"""
+        self.insert_box(sprite, (sprite.left, sprite.bottom), (sprite.right, sprite.top))
+
+    def insert_box(self, item, lo, hi):
+        """Add an enemy with the box given by its lo and hi corners"""
+        cells = list(self._cell_range(
+            lo[0] - self.offset,
+            hi[0] - self.offset,
+            lo[1],
+            hi[1],
+        ))
+        for cell in cells:
+            self._cells.setdefault(cell, []).append(item)
+        self._cells_of[item] = cells
+
+    def remove(self, sprite):
+        for cell in self._cells_of.pop(sprite, ()):
+            bucket = self._cells[cell]
+            bucket.remove(sprite)
+            if not bucket:
+                del self._cells[cell]
+
+    def scroll(self, dx):
+        """Shift every enemy in the grid horizontally by dx pixels"""
+        self.offset += dx
+
+    def query(self, sprite, margin=0):
+        """Return the enemies sharing a cell with the sprite's bounding box
+
+        Arguments:
+            sprite {arcade.Sprite} -- Sprite to test, usually the player
+            margin {float} -- Extra pixels added around the bounding box
+        """
+        return self.query_box(
+            (sprite.left, sprite.bottom), (sprite.right, sprite.top), margin
+        )
+
+    def query_box(self, lo, hi, margin=0):
+        """Return the enemies sharing a cell with a box
+
+        Arguments:
+            lo, hi {tuple} -- Corners of the box in screen coordinates
+            margin {float} -- Extra pixels added around the box
+        """
+        # Called every tick, so the cell loop is spelled out rather than
+        # going through _cell_range
+        size = self.cell_size
+        cells = self._cells
+        first_y = int((lo[1] - margin) // size)
+        last_y = int((hi[1] + margin) // size)
+        candidates = []
+        for cell_x in range(
+            int((lo[0] - margin - self.offset) // size),
+            int((hi[0] + margin - self.offset) // size) + 1,
+        ):
+            for cell_y in range(first_y, last_y + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket:
+                    for enemy in bucket:
+                        # Only a few enemies share the player's cells
+                        if enemy not in candidates:
+                            candidates.append(enemy)
+        return candidates
+
+    def __len__(self):
+        return len(self._cells_of)
+
+
+def sweep_box(lo, hi, displacement, target_lo, target_hi):
+    """Swept AABB test of a box against a static box
+
+    Returns:
+        (enter, leave) of the overlap in [0, 1], or None if they never touch
+    """
+    enter, leave = -math.inf, math.inf
+    for axis in (0, 1):
+        start_lo = lo[axis] - displacement[axis]
+        start_hi = hi[axis] - displacement[axis]
+        if displacement[axis] == 0:
+            if start_hi <= target_lo[axis] or start_lo >= target_hi[axis]:
+                return None
+            continue
+        first = (target_lo[axis] - start_hi) / displacement[axis]
+        second = (target_hi[axis] - start_lo) / displacement[axis]
+        enter = max(enter, min(first, second))
+        leave = min(leave, max(first, second))
+    if enter > leave or enter > 1.0 or leave < 0.0:
+        return None
+    return max(enter, 0.0), min(leave, 1.0)
@@ -0,0 +1,151 @@
+"""Opt-in frame-time instrumentation
+
+Set SUPERMAN_PROFILE=1 to time the hot phases of every frame, and
+SUPERMAN_TRACE=trace.csv (or .json) to also write a per-frame trace
+when a level ends. Every process writes its own file, trace-<pid>.csv,
+holding the frames of the level that ended last. F3 toggles the
+on-screen overlay during play.
+"""
+import csv
+import functools
+import json
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+
+
+class _PhaseTimer():
+    __slots__ = ("profiler", "phase", "start")
+
+    def __init__(self, profiler, phase):
+        self.profiler = profiler
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.phase, time.perf_counter_ns() - self.start)
+        return False
+
+
+class FrameProfiler():
+    """Rolling per-phase frame timings with an optional per-frame trace"""
+
+    def __init__(self, enabled=False, window=600, trace_path=None, max_trace_frames=36000):
+        """
+        Arguments:
+            enabled {bool} -- Whether timers record anything
+            window {int} -- Frames kept for the rolling percentiles
+            trace_path {str} -- Where dump() writes the trace, .csv or .json
+            max_trace_frames {int} -- Oldest frames are dropped past this
+        """
+        self.enabled = enabled
+        self.window = window
+        self.trace_path = trace_path
+        self.samples = {}
+        self.trace = deque(maxlen=max_trace_frames) if trace_path else None
+        self.overlay = False
+        self.frames = 0
+        self._frame = {}
+        self._frame_start = time.perf_counter_ns()
+        self._null = nullcontext()
+
+    def measure(self, phase):
+        """Context manager timing one phase of the current frame"""
+        if not self.enabled:
+            return self._null
+        return _PhaseTimer(self, phase)
+
+    def timed(self, phase):
+        """Decorator timing every call of a function as one phase"""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _PhaseTimer(self, phase):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, phase, nanoseconds):
+        self._frame[phase] = self._frame.get(phase, 0) + nanoseconds
+
+    def end_frame(self):
+        """Close the current frame and fold its timings into the statistics"""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        self._frame["frame"] = now - self._frame_start
+        self._frame_start = now
+        for phase, nanoseconds in self._frame.items():
+            samples = self.samples.get(phase)
+            if samples is None:
+                samples = self.samples[phase] = deque(maxlen=self.window)
+            samples.append(nanoseconds)
+        if self.trace is not None:
+            self.trace.append(self._frame)
+        self._frame = {}
+        self.frames += 1
+
+    def percentiles(self, phase):
+        """Return (p50, p95, p99) of a phase in milliseconds"""
+        samples = sorted(self.samples.get(phase, ()))
+        if not samples:
+            return (0.0, 0.0, 0.0)
+        last = len(samples) - 1
+        return tuple(samples[int(last * q)] / 1e6 for q in (0.50, 0.95, 0.99))
+
+    def summary(self):
+        """Return one text line per phase, the slowest p99 first"""
+        rows = sorted(
+            ((phase,) + self.percentiles(phase) for phase in self.samples),
+            key=lambda row: row[3],
+            reverse=True,
+        )
+        return [
+            f"{phase:<12} p50 {p50:6.2f}  p95 {p95:6.2f}  p99 {p99:6.2f} ms"
+            for phase, p50, p95, p99 in rows
+        ]
+
+    def process_path(self, path=None):
+        """Return the trace path with this process's id, so parallel runs
+        such as the self-play workers do not overwrite each other
+        """
+        path = path or self.trace_path
+        if not path:
+            return None
+        root, extension = os.path.splitext(path)
+        return f"{root}-{os.getpid()}{extension}"
+
+    def dump(self, path=None):
+        """Write the per-frame trace as CSV or JSON, by file extension,
+        and start a new trace
+
+        Arguments:
+            path {str} -- Written as is, trace_path with the process id if not given
+        """
+        path = path or self.process_path()
+        if not path or not self.trace:
+            return
+        frames = list(self.trace)
+        self.trace.clear()
+        if path.endswith(".json"):
+            with open(path, "w") as trace_file:
+                json.dump(frames, trace_file)
+            return
+        phases = sorted({phase for frame in frames for phase in frame})
+        with open(path, "w", newline="") as trace_file:
+            writer = csv.writer(trace_file)
+            writer.writerow(["frame_index"] + [f"{phase}_ns" for phase in phases])
+            for index, frame in enumerate(frames):
+                writer.writerow([index] + [frame.get(phase, 0) for phase in phases])
+
+
+PROFILER = FrameProfiler(
+    enabled=os.environ.get("SUPERMAN_PROFILE") == "1" or bool(os.environ.get("SUPERMAN_TRACE")),
+    trace_path=os.environ.get("SUPERMAN_TRACE"),
+)
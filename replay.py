@@ -0,0 +1,215 @@
+"""Compact replay files
+
+A replay holds everything needed to re-simulate a run: the level, the
+seed of its spawn timeline, the window size, the tick rate and every key
+press and release with the simulation tick it arrived before. Set
+SUPERMAN_REPLAYS=dir to keep a replay of every finished run.
+
+File layout, little endian:
+
+    "SMRP", version byte, flags byte
+    level, seed, width, height, scaling, tick rate, ticks, scores
+    body: event count, then per event three varints:
+        ticks since the previous event, symbol << 1 | pressed, modifiers
+
+The body is zlib-compressed when flags has COMPRESSED set.
+
+Re-simulate a replay headless and check it against its recorded result:
+
+    python replay.py level3-1700000000-42.smr
+"""
+import struct
+import sys
+import time
+import zlib
+from dataclasses import dataclass, field
+
+MAGIC = b"SMRP"
+# Version 1 counted the score on the wall clock, it cannot be verified.
+# Version 2 rounded the scaling to a float32
+VERSION = 3
+COMPRESSED = 0x01
+
+_PREAMBLE = struct.Struct("<4sBB")
+_HEADER = struct.Struct("<HQHHdHII")
+
+
+class ReplayError(ValueError):
+    """A replay file is malformed"""
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError("truncated event data")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+@dataclass
+class Replay():
+    level: int
+    seed: int
+    width: int
+    height: int
+    scaling: float
+    tick_rate: int
+    # Ticks simulated and score reached, filled in when the run ends
+    ticks: int = 0
+    scores: int = 0
+    # (tick, "press" or "release", symbol, modifiers), in arrival order
+    events: list = field(default_factory=list)
+
+    def record(self, tick, kind, symbol, modifiers):
+        self.events.append((tick, kind, symbol, modifiers))
+
+    def to_bytes(self, compress=True):
+        body = bytearray()
+        _write_varint(body, len(self.events))
+        previous = 0
+        for tick, kind, symbol, modifiers in self.events:
+            _write_varint(body, tick - previous)
+            _write_varint(body, symbol << 1 | (kind == "press"))
+            _write_varint(body, modifiers)
+            previous = tick
+        flags = 0
+        if compress:
+            body = zlib.compress(bytes(body), 9)
+            flags |= COMPRESSED
+        return b"".join((
+            _PREAMBLE.pack(MAGIC, VERSION, flags),
+            _HEADER.pack(self.level, self.seed, self.width, self.height,
+                         self.scaling, self.tick_rate, self.ticks, self.scores),
+            bytes(body),
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < _PREAMBLE.size + _HEADER.size:
+            raise ReplayError("too short to be a replay")
+        magic, version, flags = _PREAMBLE.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("not a replay file")
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        replay = cls(*_HEADER.unpack_from(data, _PREAMBLE.size))
+        body = data[_PREAMBLE.size + _HEADER.size:]
+        if flags & COMPRESSED:
+            try:
+                body = zlib.decompress(body)
+            except zlib.error as error:
+                raise ReplayError(f"corrupt event data: {error}") from error
+
+        count, offset = _read_varint(body, 0)
+        tick = 0
+        for _ in range(count):
+            delta, offset = _read_varint(body, offset)
+            key, offset = _read_varint(body, offset)
+            modifiers, offset = _read_varint(body, offset)
+            tick += delta
+            replay.record(tick, "press" if key & 1 else "release", key >> 1, modifiers)
+        return replay
+
+    def save(self, path, compress=True):
+        with open(path, "wb") as replay_file:
+            replay_file.write(self.to_bytes(compress))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as replay_file:
+            return cls.from_bytes(replay_file.read())
+
+
+@dataclass
+class ReplayResult():
+    ticks: int
+    scores: int
+    collided: bool
+    # Wall-clock seconds the re-simulation took
+    seconds: float
+
+    def matches(self, replay):
+        """Whether the run ends on the recorded tick with the recorded score"""
+        return self.ticks == replay.ticks and self.scores == replay.scores
+
+
+def resimulate(replay):
+    """Play a replay back headless, one frame per simulation tick
+
+    Arguments:
+        replay {Replay} -- Recorded run
+
+    Returns:
+        ReplayResult -- How the re-simulated run ended
+    """
+    # Imported here so replays can be written and read without the game
+    from simulation import Simulation
+
+    started = time.perf_counter()
+    sim = Simulation(
+        replay.level,
+        seed=replay.seed,
+        timestep=1 / replay.tick_rate,
+        width=replay.width,
+        height=replay.height,
+        scaling=replay.scaling,
+    )
+    level = sim.level
+    level.tick_rate = replay.tick_rate
+    # The run is already recorded, so the level keeps no replay of its own
+    level.replay = None
+    events = replay.events
+    index = 0
+    # A run never lasts more than its recorded ticks plus the collision pause
+    frames = replay.ticks + 2 * replay.tick_rate
+    while sim.frame < frames:
+        # Keyed on ticks rather than frames: paused frames do not tick
+        while index < len(events) and events[index][0] <= level.ticks:
+            _, kind, symbol, modifiers = events[index]
+            if kind == "press":
+                sim.press(symbol, modifiers)
+            else:
+                sim.release(symbol, modifiers)
+            index += 1
+        # Quitting takes effect at once, not after one more frame
+        if sim.finished:
+            break
+        sim.step()
+    return ReplayResult(
+        ticks=level.ticks,
+        scores=level.scores,
+        collided=level.collided,
+        seconds=time.perf_counter() - started,
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python replay.py REPLAY")
+    try:
+        recorded = Replay.load(sys.argv[1])
+    except (OSError, ReplayError) as error:
+        sys.exit(f"invalid: {error}")
+    result = resimulate(recorded)
+    simulated = result.ticks / recorded.tick_rate
+    print(f"level {recorded.level}, seed {recorded.seed}, {len(recorded.events)} key events")
+    print(f"recorded: {recorded.ticks} ticks, score {recorded.scores}")
+    print(f"replayed: {result.ticks} ticks, score {result.scores}, "
+          f"{'collided' if result.collided else 'quit'}")
+    print(f"{simulated:.1f} s of play in {result.seconds:.2f} s "
+          f"({simulated / max(result.seconds, 1e-9):.0f}x real time)")
+    if not result.matches(recorded):
+        sys.exit("mismatch: the replay does not end as it was recorded to")
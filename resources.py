@@ -0,0 +1,250 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import arcade
+import pyglet
+
+
+class TextureRegistry():
+    """Process-wide cache of decoded textures
+    Every asset is decoded once, its hit box is computed once,
+    and all sprites built from it share the same arcade.Texture
+    """
+
+    def __init__(self):
+        self._textures = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load_times = {}
+
+    def get(self, path):
+        """Return the shared texture for an image file
+
+        Arguments:
+            path {str} -- Path of the image file
+        """
+        texture = self._textures.get(path)
+        if texture is not None:
+            self.hits += 1
+            return texture
+
+        start = time.perf_counter()
+        texture = arcade.load_texture(path)
+        # Touch the hit box so it is computed here and not on first collision
+        texture.hit_box_points
+        with self._lock:
+            if path in self._textures:
+                # Another thread decoded it first, keep a single instance
+                self.hits += 1
+                return self._textures[path]
+            self.misses += 1
+            self._textures[path] = texture
+            self.load_times[path] = time.perf_counter() - start
+        return texture
+
+    def stats(self):
+        """Return the hit/miss counters of the registry"""
+        lookups = self.hits + self.misses
+        return {
+            "textures": len(self._textures),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        self._textures.clear()
+        self.hits = 0
+        self.misses = 0
+        self.load_times.clear()
+
+
+class ResourceManager():
+    """Loads every texture and sound once and hands out shared handles
+    preload() decodes a list of assets on a thread pool, so a splash
+    screen can warm everything up before the first menu is shown
+    """
+
+    def __init__(self, textures):
+        self.textures = textures
+        self._sounds = {}
+        self._lock = threading.Lock()
+        self.sound_load_times = {}
+
+    def texture(self, path):
+        return self.textures.get(path)
+
+    def sound(self, path):
+        """Return the shared sound for an audio file
+
+        Arguments:
+            path {str} -- Path of the audio file
+        """
+        sound = self._sounds.get(path)
+        if sound is not None:
+            return sound
+
+        start = time.perf_counter()
+        sound = arcade.load_sound(path)
+        with self._lock:
+            if path in self._sounds:
+                return self._sounds[path]
+            self._sounds[path] = sound
+            self.sound_load_times[path] = time.perf_counter() - start
+        return sound
+
+    def preload(self, textures=(), sounds=(), workers=4, tasks=()):
+        """Start loading assets in parallel and return their futures
+
+        Arguments:
+            textures {iterable} -- Image paths
+            sounds {iterable} -- Audio paths
+            workers {int} -- Size of the loader thread pool
+            tasks {iterable} -- Other warm-up callables run on the same pool
+        """
+        executor = ThreadPoolExecutor(workers, thread_name_prefix="preload")
+        futures = [executor.submit(self.texture, path) for path in textures]
+        futures += [executor.submit(self.sound, path) for path in sounds]
+        futures += [executor.submit(task) for task in tasks]
+        executor.shutdown(wait=False)
+        return futures
+
+    def report(self):
+        """Return (path, seconds) for every loaded asset, slowest first"""
+        load_times = dict(self.textures.load_times)
+        load_times.update(self.sound_load_times)
+        return sorted(load_times.items(), key=lambda item: item[1], reverse=True)
+
+
+class MusicPlayer():
+    """Background music streamed from disk by one long-lived player
+    The track is read in chunks while it plays instead of being decoded
+    whole, and the same player carries on across levels and menus
+    """
+
+    def __init__(self):
+        self.path = None
+        self.sound = None
+        self.player = None
+        self.open_time = None
+
+    def play(self, path, volume=1.0, restart=True):
+        """Loop a track, reusing the player when the track is already open
+
+        Arguments:
+            path {str} -- Path of the audio file
+            restart {bool} -- Start over instead of resuming where it paused
+        """
+        if path != self.path:
+            self.close()
+            start = time.perf_counter()
+            self.sound = arcade.load_sound(path, streaming=True)
+            self.player = self.sound.play(volume=volume, loop=True)
+            self.path = path
+            self.open_time = time.perf_counter() - start
+            return self.player
+        if restart:
+            self.player.seek(0.0)
+        self.player.volume = volume
+        self.player.play()
+        return self.player
+
+    def pause(self):
+        if self.player is not None:
+            self.player.pause()
+
+    def close(self):
+        if self.player is not None:
+            self.player.pause()
+            self.player.delete()
+        self.path = None
+        self.sound = None
+        self.player = None
+
+
+class SfxMixer():
+    """Plays short sound effects on a fixed pool of reused players
+    A sound played again within its min_interval is dropped. When every
+    voice is busy, the lowest-priority oldest voice is stolen if the new
+    sound's priority is at least as high, otherwise the play is dropped
+    """
+
+    def __init__(self, voices=4, clock=time.monotonic):
+        """
+        Arguments:
+            voices {int} -- Players in the pool, the most sounds heard at once
+            clock {callable} -- Time source in seconds
+        """
+        self.clock = clock
+        # [player, priority, ends_at] per voice, players built on first use
+        self.voices = [[None, 0, 0.0] for _ in range(voices)]
+        self._last_played = {}
+        self.played = 0
+        self.dropped = 0
+        self.stolen = 0
+
+    @property
+    def active(self):
+        now = self.clock()
+        return sum(1 for voice in self.voices if voice[2] > now)
+
+    def play(self, sound, priority=0, min_interval=0.0, volume=1.0):
+        """Play a decoded sound on a free or stolen voice
+
+        Arguments:
+            sound {arcade.Sound} -- Sound with a static (decoded) source
+            priority {int} -- Higher priorities steal voices from lower ones
+            min_interval {float} -- Seconds before this sound may play again
+
+        Returns:
+            pyglet.media.Player -- The voice, or None if the play was dropped
+        """
+        now = self.clock()
+        if now - self._last_played.get(sound, -math.inf) < min_interval:
+            self.dropped += 1
+            return None
+
+        free = [voice for voice in self.voices if voice[2] <= now]
+        if free:
+            voice = free[0]
+        else:
+            voice = min(self.voices, key=lambda voice: (voice[1], voice[2]))
+            if voice[1] > priority:
+                self.dropped += 1
+                return None
+            self.stolen += 1
+
+        player = voice[0]
+        if player is None:
+            player = voice[0] = pyglet.media.Player()
+        else:
+            player.pause()
+            # Drop whatever the voice was still playing
+            while player.source is not None:
+                player.next_source()
+        player.volume = volume
+        player.queue(sound.source)
+        player.play()
+        voice[1] = priority
+        voice[2] = now + sound.source.duration
+        self._last_played[sound] = now
+        self.played += 1
+        return player
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "voices": len(self.voices),
+            "played": self.played,
+            "dropped": self.dropped,
+            "stolen": self.stolen,
+        }
+
+
+TEXTURES = TextureRegistry()
+RESOURCES = ResourceManager(TEXTURES)
+MUSIC = MusicPlayer()
+SFX = SfxMixer()
@@ -0,0 +1,315 @@
+"""Bots playing the levels headless, fanned out over every CPU core
+
+Each run drives a simulation.Simulation through the same key presses a
+player would send, with one of the bot policies below choosing them.
+Runs are independent, so they are spread over a multiprocessing pool
+and the results are folded into one report per level and policy:
+
+    python selfplay.py --runs 200
+    python selfplay.py --levels 3 --policies greedy lookahead --runs 1000 --json report.json
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+
+import arcade
+
+# Arrow keys the bots press, by direction
+HORIZONTAL_KEYS = {-1: arcade.key.LEFT, 1: arcade.key.RIGHT}
+VERTICAL_KEYS = {-1: arcade.key.DOWN, 1: arcade.key.UP}
+
+
+class Observation():
+    """What a bot sees of the level before a decision"""
+
+    __slots__ = ("player", "missiles", "velocity", "player_velocity", "width", "height")
+
+    def __init__(self, level):
+        level.sync_sprites()
+        player = level.player
+        self.player = (player.left, player.bottom, player.right, player.top)
+        self.missiles = [
+            (enemy.left, enemy.bottom, enemy.right, enemy.top)
+            for enemy in level.enemies_list
+        ]
+        self.velocity = level.enemy_velocity[0]
+        self.player_velocity = level.player_velocity
+        self.width = level.window.width
+        self.height = level.window.height
+
+
+class RandomPolicy():
+    """Holds a random direction for a random number of decisions"""
+
+    name = "random"
+    # Frames between two decisions
+    every = 6
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.action = (0, 0)
+        self.hold = 0
+
+    def act(self, observation):
+        if self.hold <= 0:
+            self.action = (self.rng.choice((-1, 0, 1)), self.rng.choice((-1, 0, 1)))
+            self.hold = self.rng.randint(1, 8)
+        self.hold -= 1
+        return self.action
+
+
+class GreedyDodgePolicy():
+    """Steps out of the row of the closest incoming missile
+    Goes whichever way clears it sooner, unless a wall is in the way,
+    and backs off to the left to get more time to react
+    """
+
+    name = "greedy"
+    every = 2
+    # Seconds ahead a missile counts as a threat
+    horizon = 1.0
+    margin = 12
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def act(self, observation):
+        left, bottom, right, top = observation.player
+        speed = -observation.velocity
+        threat = None
+        for m_left, m_bottom, m_right, m_top in observation.missiles:
+            if m_right < left or m_bottom > top + self.margin or m_top < bottom - self.margin:
+                continue
+            arrival = max(0.0, m_left - right) / speed
+            if arrival <= self.horizon and (threat is None or arrival < threat[0]):
+                threat = (arrival, m_bottom, m_top)
+        horizontal = -1 if left > 10 else 0
+        if threat is None:
+            return (horizontal, 0)
+
+        _, m_bottom, m_top = threat
+        up = m_top + self.margin - bottom
+        down = top - (m_bottom - self.margin)
+        room_up = observation.height - top
+        room_down = bottom
+        if up <= room_up and (up <= down or down > room_down):
+            return (horizontal, 1)
+        if down <= room_down:
+            return (horizontal, -1)
+        return (horizontal, 1 if room_up > room_down else -1)
+
+
+class LookaheadPolicy():
+    """Tries every direction over a short horizon and keeps the safest
+    Missiles are extrapolated at the level's velocity; a move is scored by
+    the smallest gap it keeps to any missile within the horizon
+    """
+
+    name = "lookahead"
+    every = 4
+    horizon = 0.6
+    steps = 12
+    ACTIONS = [(h, v) for v in (0, 1, -1) for h in (0, -1, 1)]
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def act(self, observation):
+        left, bottom, right, top = observation.player
+        width, height = right - left, top - bottom
+        vx = observation.velocity
+        reach = self.horizon * (observation.player_velocity - vx)
+        # Only missiles that could come near within the horizon matter
+        nearby = [
+            missile for missile in observation.missiles
+            if missile[2] > left - reach and missile[0] < right + reach
+            and missile[3] > bottom - reach and missile[1] < top + reach
+        ]
+        if not nearby:
+            return (-1 if left > 10 else 0, 0)
+
+        dt = self.horizon / self.steps
+        step = observation.player_velocity * dt
+        best, best_gap = (0, 0), -math.inf
+        for h, v in self.ACTIONS:
+            x, y = left, bottom
+            gap = math.inf
+            for index in range(1, self.steps + 1):
+                x = min(max(x + h * step, 0.0), observation.width - width)
+                y = min(max(y + v * step, 0.0), observation.height - height)
+                shift = vx * dt * index
+                for m_left, m_bottom, m_right, m_top in nearby:
+                    dx = max(m_left + shift - (x + width), x - (m_right + shift), 0.0)
+                    dy = max(m_bottom - (y + height), y - m_top, 0.0)
+                    gap = min(gap, math.hypot(dx, dy))
+                if gap <= 0.0:
+                    break
+            if gap > best_gap:
+                best, best_gap = (h, v), gap
+        return best
+
+
+POLICIES = {policy.name: policy for policy in (RandomPolicy, GreedyDodgePolicy, LookaheadPolicy)}
+
+
+class Controls():
+    """Turns a bot's wanted direction into key presses and releases"""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.held = {"horizontal": 0, "vertical": 0}
+
+    def apply(self, horizontal, vertical):
+        for axis, wanted, keys in (
+            ("horizontal", horizontal, HORIZONTAL_KEYS),
+            ("vertical", vertical, VERTICAL_KEYS),
+        ):
+            current = self.held[axis]
+            if wanted == current:
+                continue
+            # Release first: letting go of a key stops the whole axis
+            if current:
+                self.sim.release(keys[current])
+            if wanted:
+                self.sim.press(keys[wanted])
+            self.held[axis] = wanted
+
+
+def collision_cause(level):
+    """Classify what hit the player, for the report"""
+    if not level.hit_by:
+        return None
+    player = level.player
+    enemy = level.hit_by[0]
+    if enemy.right >= level.window.width - 1:
+        return "spawned on player"
+    if player.top >= level.window.height - 1 or player.bottom <= 1:
+        return "cornered at edge"
+    offset = enemy.center_y - player.center_y
+    if abs(offset) < player.height / 4:
+        return "head-on"
+    return "clipped from above" if offset > 0 else "clipped from below"
+
+
+def play(task):
+    """Play one run to its first collision or to the time limit
+
+    Arguments:
+        task {tuple} -- (level, policy name, seed, max seconds)
+
+    Returns:
+        dict -- Outcome of the run
+    """
+    from simulation import Simulation
+
+    level_number, policy_name, seed, max_seconds = task
+    sim = Simulation(level_number, seed=seed)
+    level = sim.level
+    policy = POLICIES[policy_name](random.Random(seed))
+    controls = Controls(sim)
+    frames = int(round(max_seconds / sim.timestep))
+    while not level.collided and not sim.finished and sim.frame < frames:
+        if sim.frame % policy.every == 0:
+            controls.apply(*policy.act(Observation(level)))
+        sim.step()
+    return {
+        "level": level_number,
+        "policy": policy_name,
+        "seed": seed,
+        "survived": level.elapsed,
+        "scores": level.scores,
+        "cause": collision_cause(level) or "time limit",
+    }
+
+
+def _quantile(values, q):
+    values = sorted(values)
+    return values[int(round((len(values) - 1) * q))]
+
+
+def summarize(results):
+    """Fold run outcomes into one entry per (level, policy)"""
+    groups = {}
+    for result in results:
+        groups.setdefault((result["level"], result["policy"]), []).append(result)
+    report = []
+    for (level, policy), runs in sorted(groups.items()):
+        survived = [run["survived"] for run in runs]
+        scores = [run["scores"] for run in runs]
+        causes = {}
+        for run in runs:
+            causes[run["cause"]] = causes.get(run["cause"], 0) + 1
+        report.append({
+            "level": level,
+            "policy": policy,
+            "runs": len(runs),
+            "survived_mean": statistics.fmean(survived),
+            "survived_p50": _quantile(survived, 0.50),
+            "survived_p90": _quantile(survived, 0.90),
+            "survived_max": max(survived),
+            "scores_mean": statistics.fmean(scores),
+            "scores_p50": _quantile(scores, 0.50),
+            "scores_p90": _quantile(scores, 0.90),
+            "causes": dict(sorted(causes.items(), key=lambda item: item[1], reverse=True)),
+        })
+    return report
+
+
+def run_all(levels, policies, runs, max_seconds, seed=0, workers=None, chunksize=4):
+    """Play every (level, policy) pair runs times over a process pool
+
+    Returns:
+        list -- Outcome of every run, in completion order
+    """
+    tasks = [
+        (level, policy, seed + index, max_seconds)
+        for level in levels
+        for policy in policies
+        for index in range(runs)
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [play(task) for task in tasks]
+    with multiprocessing.Pool(workers) as pool:
+        return list(pool.imap_unordered(play, tasks, chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=sorted(POLICIES))
+    parser.add_argument("--runs", type=int, default=50, help="runs per level and policy")
+    parser.add_argument("--max-seconds", type=float, default=120.0, help="game time limit of a run")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first run")
+    parser.add_argument("--workers", type=int, default=None, help="processes, one per core by default")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = run_all(args.levels, args.policies, args.runs, args.max_seconds, args.seed, args.workers)
+    elapsed = time.perf_counter() - started
+    report = summarize(results)
+
+    print(f"{'level':>5} {'policy':<10} {'runs':>5} {'survived s p50/p90/max':>24} "
+          f"{'score p50/p90':>14}  causes")
+    for row in report:
+        causes = ", ".join(f"{cause} {count}" for cause, count in row["causes"].items())
+        print(f"{row['level']:>5} {row['policy']:<10} {row['runs']:>5} "
+              f"{row['survived_p50']:>8.1f}/{row['survived_p90']:.1f}/{row['survived_max']:.1f} "
+              f"{row['scores_p50']:>8}/{row['scores_p90']:<5}  {causes}")
+    total_game = sum(result["survived"] for result in results)
+    print(f"{len(results)} runs, {total_game:.0f} s of play in {elapsed:.1f} s "
+          f"on {args.workers or os.cpu_count()} worker(s)", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w") as report_file:
+            json.dump({"runs": results, "report": report}, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
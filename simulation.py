@@ -0,0 +1,120 @@
+"""Headless driver for the Level game logic
+
+Runs any level of levels.json with a fixed timestep, a seeded spawn
+timeline and scripted key presses, without a window, rendering or audio:
+
+    sim = Simulation(3, seed=42)
+    sim.run(seconds=30)
+    print(sim.frame, sim.level.scores)
+"""
+import random
+from collections import deque
+
+import arcade
+
+import arcade_game as ag
+
+
+class HeadlessWindow():
+    """The parts of arcade.Window a Level touches during play"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.current_view = None
+
+    def show_view(self, view):
+        self.current_view = view
+
+
+class Simulation():
+    """Steps a Level at a fixed rate, one frame per call to step"""
+
+    def __init__(self, level, seed=0, timestep=1 / 60, inputs=(),
+                 width=1600, height=1200, scaling=2.0, userName="bot",
+                 pool_size=None):
+        """Create and set up the level
+
+        Arguments:
+            level {int} -- Level number in levels.json
+            seed {int} -- Seed of the spawn timeline
+            timestep {float} -- Seconds simulated per frame
+            inputs {iterable} -- (frame, "press" or "release", symbol,
+            modifiers) events fed to the level before that frame
+            width, height {int} -- Size of the imaginary window
+            pool_size {int} -- Overrides the level's enemy pool size
+        """
+        self.timestep = timestep
+        self.time = 0.0
+        self.frame = 0
+        self.inputs = sorted(inputs, key=lambda event: event[0])
+        self._next_input = 0
+
+        self.window = HeadlessWindow(width, height)
+        try:
+            arcade.get_window()
+        except RuntimeError:
+            # arcade.View builds a camera from the active window
+            arcade.set_window(self.window)
+        self.level = ag.Level(scaling, userName, level, window=self.window, seed=seed)
+        self.level.headless = True
+        self.rng = random.Random(seed)
+        if pool_size is not None:
+            self.level.enemy_pool_size = pool_size
+        self.window.show_view(self.level)
+        self.level.setup()
+
+    @property
+    def finished(self):
+        return self.level.finished
+
+    def press(self, symbol, modifiers=0):
+        self.level.on_key_press(symbol, modifiers)
+
+    def release(self, symbol, modifiers=0):
+        self.level.on_key_release(symbol, modifiers)
+
+    def step(self):
+        """Simulate one frame: scripted input, then the level update"""
+        while (self._next_input < len(self.inputs)
+               and self.inputs[self._next_input][0] <= self.frame):
+            _, kind, symbol, modifiers = self.inputs[self._next_input]
+            if kind == "press":
+                self.press(symbol, modifiers)
+            else:
+                self.release(symbol, modifiers)
+            self._next_input += 1
+
+        self.time += self.timestep
+        self.level.on_update(self.timestep)
+        self.frame += 1
+
+    def run(self, seconds=None, frames=None):
+        """Step until the game is over or the frame/time budget is spent
+
+        Returns:
+            int -- Number of frames simulated by this call
+        """
+        if frames is None and seconds is not None:
+            frames = int(round(seconds / self.timestep))
+        start = self.frame
+        while not self.finished and (frames is None or self.frame - start < frames):
+            self.step()
+        return self.frame - start
+
+    def populate(self, count, span=None):
+        """Put count missiles on screen at once, spread along span pixels
+        Used to measure the update cost at a given number of live missiles
+        """
+        level = self.level
+        span = span or self.window.width
+        for _ in range(count):
+            level.add_enemy(self.rng.randint(10, self.window.height - 10))
+        left = level.enemy_box[0]
+        for enemy in level.enemies_list:
+            level.enemy_index.remove(enemy)
+            x = self.rng.randint(0, span) - left
+            level.track_enemy(enemy, x, enemy.home_y)
+        # Enemies are recycled from the front, so keep the leftmost there
+        level.live_enemies = deque(sorted(level.live_enemies, key=lambda enemy: enemy.home_x))
+
@@ -0,0 +1,66 @@
+"""Seeded spawn timelines
+
+A level's spawn times come from levels.json; the height of every spawn
+comes from the run's seed. Both are generated up front into compact
+arrays that Level reads by index, so no spawn needs a random call or a
+scheduled callback while the level runs.
+"""
+import hashlib
+import math
+import random
+from array import array
+
+
+class SpawnPlan():
+    """Seeded spawn timeline of one run of a level
+    Holds the time and top edge of every missile in two compact arrays.
+    The same level, seed and window height always give the same
+    timeline, so a run can be replayed or re-checked on a server
+    """
+
+    # Spawns generated per batch once play outlasts the precomputed timetable
+    CHUNK = 1024
+
+    def __init__(self, definition, seed, height):
+        """Generate the timeline for the level's precomputed timetable
+
+        Arguments:
+            definition {levels.LevelDefinition} -- Level being played
+            seed {int} -- Seed of the run
+            height {int} -- Window height, bounds the spawn heights
+        """
+        self.definition = definition
+        self.seed = seed
+        self.height = height
+        self.times = array("d")
+        self.tops = array("H")
+        self._rng = random.Random(seed)
+        self._extend(len(definition.spawn_times))
+
+    def _extend(self, count):
+        for index in range(len(self.times), len(self.times) + count):
+            time = self.definition.spawn_time(index)
+            if time == math.inf:
+                return
+            self.times.append(time)
+            self.tops.append(self._rng.randint(10, self.height - 10))
+
+    def time(self, index):
+        """Return the time of the index-th spawn, inf when there is none"""
+        if index >= len(self.times):
+            self._extend(index - len(self.times) + self.CHUNK)
+            if index >= len(self.times):
+                return math.inf
+        return self.times[index]
+
+    def top(self, index):
+        return self.tops[index]
+
+    def checksum(self, count=None):
+        """Digest of the first count spawns, to compare timelines cheaply"""
+        count = len(self.times) if count is None else count
+        self.time(count - 1)
+        digest = hashlib.sha256()
+        digest.update(self.times[:count].tobytes())
+        digest.update(self.tops[:count].tobytes())
+        return digest.hexdigest()
@@ -0,0 +1,41 @@
+"""Cold start timing
+
+main.py imports this first, so the clock starts before arcade and the
+game modules are imported. The splash screen prints the report once
+every asset is loaded:
+
+    startup: import 612.4 ms, window 48.1 ms, first frame 35.0 ms, assets 240.7 ms
+"""
+import sys
+import time
+
+
+class StartupTimer():
+    """Time between the named milestones of the start of the game"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = []
+
+    def mark(self, phase):
+        """Record that a phase ended, once per phase"""
+        if phase not in (name for name, _ in self.marks):
+            self.marks.append((phase, time.perf_counter()))
+
+    def durations(self):
+        """Return (phase, seconds) of every phase, in order"""
+        previous = self.start
+        durations = []
+        for phase, moment in self.marks:
+            durations.append((phase, moment - previous))
+            previous = moment
+        return durations
+
+    def report(self):
+        phases = ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in self.durations())
+        build = "frozen" if getattr(sys, "frozen", False) else "source"
+        total = (self.marks[-1][1] - self.start) * 1000 if self.marks else 0.0
+        return f"startup ({build}): {phases}; total {total:.1f} ms"
+
+
+STARTUP = StartupTimer()
@@ -0,0 +1,61 @@
+import threading
+
+import database as db
+
+
+def cache_with(rows, num=3):
+    cache = db.LeaderboardCache(loader=lambda levels, num: {level: list(rows) for level in levels})
+    cache.store({1: list(rows)}, num)
+    return cache
+
+
+def test_record_score_patches_cached_lists():
+    cache = cache_with([("ann", 90), ("bob", 70), ("cid", 50)])
+    cache.recordScore("dan", 80, 1)
+    assert cache.get([1]) == {1: [("ann", 90), ("dan", 80), ("bob", 70)]}
+    # Raising a player's score moves them up without adding a row
+    cache.recordScore("bob", 95, 1)
+    assert cache.get([1]) == {1: [("bob", 95), ("ann", 90), ("dan", 80)]}
+    # Neither a lower score of a listed player nor one below the list counts
+    cache.recordScore("ann", 10, 1)
+    cache.recordScore("eve", 5, 1)
+    assert cache.get([1]) == {1: [("bob", 95), ("ann", 90), ("dan", 80)]}
+
+
+def test_record_score_fills_a_short_list():
+    cache = cache_with([("ann", 90)])
+    cache.recordScore("bob", 5, 1)
+    assert cache.get([1]) == {1: [("ann", 90), ("bob", 5)]}
+
+
+def test_misses_load_in_the_background():
+    release = threading.Event()
+
+    def loader(levels, num):
+        release.wait(5)
+        return {level: [("ann", level * 10)] for level in levels}
+
+    cache = db.LeaderboardCache(loader=loader)
+    loaded = threading.Event()
+    assert cache.get([1, 2], callback=loaded.set) == {}
+    assert cache.loading(1)
+    release.set()
+    assert loaded.wait(5)
+    assert cache.get([1, 2]) == {1: [("ann", 10)], 2: [("ann", 20)]}
+
+
+def test_failed_loads_are_not_retried_at_once():
+    calls = []
+
+    def loader(levels, num):
+        calls.append(levels)
+        raise ConnectionError("offline")
+
+    cache = db.LeaderboardCache(loader=loader, retry_after=60.0)
+    done = threading.Event()
+    assert cache.get([1], callback=done.set) == {}
+    assert done.wait(5)
+    assert cache.get([1]) == {}
+    assert not cache.loading(1)
+    assert isinstance(cache.last_error, ConnectionError)
+    assert calls == [[1]]
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+
+import database as db
+from leaderboard_service import LeaderboardService, ScoreIndex, SqliteBackend
+
+
+def test_score_index_keeps_each_players_best():
+    index = ScoreIndex()
+    assert index.update("ann", 1, 50)
+    assert index.update("bob", 1, 70)
+    assert not index.update("ann", 1, 40)
+    assert index.update("ann", 1, 90)
+    index.update("cid", 2, 10)
+    assert index.top(1, 3) == [("ann", 90), ("bob", 70)]
+    assert index.top(1, 1) == [("ann", 90)]
+    assert index.top(3, 3) == []
+    assert len(index) == 3
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Leaderboard service on a local SQLite backend, on its own event loop thread"""
+    service = LeaderboardService(SqliteBackend(str(tmp_path / "leaderboard.sqlite3")), batch_delay=0.001)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(service.start("127.0.0.1", 0))
+        service.port = server.sockets[0].getsockname()[1]
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(5)
+    yield service
+    asyncio.run_coroutine_threadsafe(service.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    service.backend.close()
+
+
+def test_client_round_trip(service):
+    client = db.LeaderboardClient(f"http://127.0.0.1:{service.port}")
+    try:
+        assert client.addScores([
+            ("a", "ann", 1, 50, 1000.0),
+            ("b", "bob", 1, 70, 1000.0),
+            ("c", "ann", 2, 10, 1000.0),
+        ]) == 3
+        # A batch resent after a lost reply stores nothing twice
+        assert client.addScores([("a", "ann", 1, 50, 1000.0), ("d", "ann", 1, 90, 2000.0)]) == 1
+        assert client.getTopScores([1, 2, 3]) == {
+            1: [("ann", 90), ("bob", 70)],
+            2: [("ann", 10)],
+            3: [],
+        }
+        assert client.getAllScores(1, num=1) == [("ann", 90)]
+    finally:
+        client.close()
+    # The improved best keeps the time it was reached
+    assert service.backend.conn.execute(
+        "select score, achieved_at from scores join users on users.id = user_id"
+        " where name = 'ann' and level = 1"
+    ).fetchall() == [(90, "1970-01-01 00:33:20")]
+
+
+def test_bad_requests(service):
+    client = db.LeaderboardClient(f"http://127.0.0.1:{service.port}")
+    try:
+        with pytest.raises(RuntimeError, match="400"):
+            client._request("POST", "/scores", {"scores": [{"name": "ann"}]})
+        with pytest.raises(RuntimeError, match="404"):
+            client._request("GET", "/nowhere")
+    finally:
+        client.close()
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+import levels
+from levels import LevelError
+
+
+def level_entry(**overrides):
+    entry = {
+        "level": 1,
+        "background": "assets/background1.jpg",
+        "pool_size": 16,
+        "velocity": [[0, -150]],
+        "waves": [{"start": 0, "interval": 1.0}],
+    }
+    entry.update(overrides)
+    return entry
+
+
+def test_velocity_and_spawns_past_the_timetable():
+    definition = levels.compile_level(
+        level_entry(velocity=[[0, -100], [10, -300]], waves=[{"start": 0, "interval": 2}]),
+        duration=10.0,
+        where="test",
+    )
+    assert definition.velocity_at(5.0) == (-200.0, 0)
+    assert definition.velocity_at(20.0) == (-300.0, 0)
+    assert definition.spawn_times == (2.0, 4.0, 6.0, 8.0, 10.0)
+    assert definition.spawn_time(6) == 14.0
+
+
+@pytest.mark.parametrize("entry, message", [
+    ({"level": 1}, "missing"),
+    (level_entry(level=0), "positive integer"),
+    (level_entry(pool_size=True), "positive integer"),
+    (level_entry(velocity=[[0, 150]]), "velocity must be negative"),
+    (level_entry(velocity=[[5, -150], [5, -200]]), "must increase"),
+    (level_entry(waves=[]), "non-empty"),
+    (level_entry(waves=[{"start": 0, "interval": 0}]), "must be >"),
+    (level_entry(waves=[{"start": 5, "end": 5, "interval": 1}]), "must be >"),
+    (level_entry(waves=[{"start": 0, "interval": [1, 2, 3]}]), "expected \\[from, to\\]"),
+])
+def test_invalid_level(entry, message):
+    with pytest.raises(LevelError, match=message):
+        levels.compile_level(entry, duration=600.0, where="test")
+
+
+def test_duplicate_level(tmp_path):
+    path = tmp_path / "levels.json"
+    path.write_text(json.dumps({"levels": [level_entry(), level_entry()]}))
+    with pytest.raises(LevelError, match="defined twice"):
+        levels.load_levels(str(path))
@@ -0,0 +1,123 @@
+import random
+
+import arcade
+import pytest
+
+import arcade_game as ag
+import physics
+import replay
+import selfplay
+from replay import Replay, ReplayError
+from simulation import Simulation
+
+
+def recorded_run(level, seed, seconds):
+    """Play a level with random key presses and a pause, return its replay"""
+    sim = Simulation(level, seed=seed, timestep=1 / 120)
+    rng = random.Random(seed)
+    keys = [arcade.key.UP, arcade.key.DOWN, arcade.key.LEFT, arcade.key.RIGHT]
+    frames = int(seconds * 120)
+    while not sim.finished and sim.frame < frames:
+        if sim.frame % 20 == 0:
+            key = rng.choice(keys)
+            if rng.random() < 0.6:
+                sim.press(key)
+            else:
+                sim.release(key)
+        if sim.frame in (300, 420):
+            sim.press(arcade.key.P)
+        sim.step()
+    if not sim.finished:
+        sim.press(arcade.key.Q)
+    return sim.level.replay
+
+
+def test_round_trip():
+    original = Replay(3, 2 ** 40 + 7, 1600, 1200, 2.0, 120, ticks=70000, scores=5830)
+    original.record(0, "press", arcade.key.UP, 0)
+    original.record(5, "release", arcade.key.UP, arcade.key.MOD_SHIFT)
+    original.record(70000, "press", arcade.key.Q, 0)
+    for compress in (True, False):
+        assert Replay.from_bytes(original.to_bytes(compress)) == original
+
+
+def test_scaling_round_trips_exactly():
+    # Hit boxes scale with it, so it must come back as the game's float
+    original = Replay(1, 1, 1760, 1320, 1.1, 120)
+    assert Replay.from_bytes(original.to_bytes()).scaling == 1.1
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"SMRP", "too short"),
+    (b"XXXX" + bytes(40), "not a replay"),
+    (b"SMRP\x01\x00" + bytes(40), "unsupported replay version"),
+])
+def test_malformed(data, message):
+    with pytest.raises(ReplayError, match=message):
+        Replay.from_bytes(data)
+
+
+def test_truncated_events():
+    original = Replay(1, 1, 1600, 1200, 2.0, 120)
+    original.record(300, "press", arcade.key.UP, 0)
+    with pytest.raises(ReplayError):
+        Replay.from_bytes(original.to_bytes(compress=False)[:-2])
+
+
+@pytest.mark.parametrize("level, seed", [(1, 3), (2, 11), (3, 5)])
+def test_resimulation_matches_recording(level, seed):
+    recorded = Replay.from_bytes(recorded_run(level, seed, seconds=20).to_bytes())
+    assert recorded.ticks > 0
+    result = replay.resimulate(recorded)
+    assert (result.ticks, result.scores) == (recorded.ticks, recorded.scores)
+    assert result.matches(recorded)
+
+
+def test_score_follows_ticks():
+    sim = Simulation(1, seed=0, timestep=1 / 120)
+    sim.level.collides_with_enemies = lambda *steps: []
+    sim.run(frames=120 * 3)
+    sim.press(arcade.key.P)
+    # Paused frames neither tick nor score
+    sim.run(frames=120 * 2)
+    assert sim.level.ticks == 120 * 3
+    assert sim.level.scores == 30
+
+
+def test_ten_minute_replay_resimulates_in_under_a_second(monkeypatch):
+    # A run that survives: the exact hit test never reports a touch, so
+    # missiles keep crossing the player's box as near misses do
+    monkeypatch.setattr(ag.Level, "polygons_touch", lambda self, *args: False)
+    ticks = 10 * 60 * 120
+    recorded = Replay(3, 7, 1600, 1200, 2.0, 120, ticks=ticks, scores=6000)
+    for tick in range(0, ticks, 240):
+        key = arcade.key.UP if tick % 480 else arcade.key.DOWN
+        recorded.record(tick, "press", key, 0)
+        recorded.record(tick + 120, "release", key, 0)
+    recorded.record(ticks, "press", arcade.key.Q, 0)
+    # Textures and NumPy are loaded once per process, not per replay
+    Simulation(3)
+    result = replay.resimulate(recorded)
+    assert result.matches(recorded)
+    assert result.seconds < 1.0
+
+
+def bot_run(level, seed, vectorized, seconds=30):
+    sim = Simulation(level, seed=seed)
+    if not vectorized:
+        sim.level.vectorized = False
+        sim.level.movement = None
+    policy = selfplay.RandomPolicy(random.Random(seed))
+    controls = selfplay.Controls(sim)
+    while not sim.level.collided and sim.frame < seconds / sim.timestep:
+        if sim.frame % policy.every == 0:
+            controls.apply(*policy.act(selfplay.Observation(sim.level)))
+        sim.step()
+    return sim.level.ticks, sim.level.scores, [enemy.slot for enemy in sim.level.hit_by]
+
+
+@pytest.mark.skipif(physics.load_numpy() is None, reason="NumPy is not installed")
+@pytest.mark.parametrize("level, seed", [(1, 0), (2, 1), (3, 2), (3, 3)])
+def test_vectorized_and_scalar_runs_match(level, seed):
+    # Replays are verified on whichever path the checking machine has
+    assert bot_run(level, seed, vectorized=True) == bot_run(level, seed, vectorized=False)
@@ -0,0 +1,116 @@
+import database as db
+
+
+class FakeDatabase():
+    """Server side of the sync, failing the first uploads if asked to"""
+
+    def __init__(self, failures=0, top=None):
+        self.failures = failures
+        self.top = top or {}
+        self.rows = {}
+        self.batches = []
+
+    def createConn(self):
+        pass
+
+    def closeConn(self):
+        pass
+
+    def addScores(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("offline")
+        self.batches.append([row[0] for row in batch])
+        # Keyed like the server, so a resent score is stored once
+        for key, userName, level, scores, achievedAt in batch:
+            self.rows.setdefault(key, (userName, level, scores))
+
+    def getTopScores(self, levels, num=3):
+        return {level: self.top.get(level, [])[:num] for level in levels}
+
+
+class RecordingWake():
+    """Stands in for the sync thread's wake event, stopping after rounds waits"""
+
+    def __init__(self, sync, rounds):
+        self.sync = sync
+        self.rounds = rounds
+        self.waits = []
+
+    def clear(self):
+        pass
+
+    def set(self):
+        pass
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        if len(self.waits) == self.rounds:
+            self.sync._stop.set()
+
+
+def test_pending_scores_are_synced(tmp_path):
+    store = db.LocalScoreStore(str(tmp_path / "scores.db"))
+    keys = [store.addScore("ann", 120, 1), store.addScore("bob", 80, 2)]
+    assert [row[0] for row in store.pending()] == keys
+
+    server = FakeDatabase()
+    sync = db.ScoreSync(store, batch_size=1)
+    sync.push(server)
+    assert server.batches == [[keys[0]], [keys[1]]]
+    assert store.pending() == []
+    assert sync.pushed == 2
+    store.close()
+
+
+def test_resent_batch_keeps_its_keys(tmp_path):
+    store = db.LocalScoreStore(str(tmp_path / "scores.db"))
+    keys = [store.addScore("ann", 120, 1), store.addScore("ann", 90, 1)]
+    server = FakeDatabase()
+    sync = db.ScoreSync(store)
+
+    # The upload went through but the game died before marking it synced
+    mark_synced = store.markSynced
+    store.markSynced = lambda keys: None
+    sync.push(server)
+    store.markSynced = mark_synced
+    assert [row[0] for row in store.pending()] == keys
+
+    sync.push(server)
+    assert server.batches == [keys, keys]
+    assert sorted(server.rows) == sorted(keys)
+    assert store.pending() == []
+    store.close()
+
+
+def test_failures_back_off_until_the_server_answers(tmp_path):
+    store = db.LocalScoreStore(str(tmp_path / "scores.db"))
+    key = store.addScore("ann", 120, 1)
+    server = FakeDatabase(failures=3, top={1: [("cid", 300)]})
+    sync = db.ScoreSync(store, database_factory=lambda: server, levels=(1,),
+                        backoff=2.0, max_backoff=5.0, pull_interval=60.0)
+    sync._wake = RecordingWake(sync, rounds=4)
+    sync._run()
+
+    # Doubling waits capped at max_backoff, then the regular pull interval
+    assert sync._wake.waits[:3] == [2.0, 4.0, 5.0]
+    assert 59.0 < sync._wake.waits[3] <= 60.0
+    assert sync.failures == 0
+    assert isinstance(sync.last_error, ConnectionError)
+    assert list(server.rows) == [key]
+    assert store.getTopScores([1]) == {1: [("cid", 300), ("ann", 120)]}
+    store.close()
+
+
+def test_pull_refreshes_the_cache_in_place(tmp_path):
+    store = db.LocalScoreStore(str(tmp_path / "scores.db"))
+    store.addScore("ann", 120, 1)
+    cache = db.LeaderboardCache(loader=store.getTopScores)
+    cache.store({1: [("ann", 120)]})
+    sync = db.ScoreSync(store, levels=(1,), leaderboard=cache)
+
+    sync.pull(FakeDatabase(top={1: [("cid", 300), ("bob", 100)]}))
+    # Served straight from the cache, merged with the local scores
+    assert cache.get([1]) == {1: [("cid", 300), ("ann", 120), ("bob", 100)]}
+    assert not cache.loading(1)
+    store.close()
@@ -0,0 +1,36 @@
+import random
+
+import physics
+
+
+def random_box(rng, size=60):
+    left, bottom = rng.uniform(0, 200), rng.uniform(0, 200)
+    return (left, bottom), (left + rng.uniform(5, size), bottom + rng.uniform(5, size))
+
+
+class Box():
+    """Stand-in for a sprite, with the edges the spatial hash reads"""
+
+    def __init__(self, lo, hi):
+        (self.left, self.bottom), (self.right, self.top) = lo, hi
+
+
+def test_spatial_hash_finds_every_overlap_after_scrolling():
+    rng = random.Random(3)
+    grid = physics.ScrollingSpatialHash(64)
+    boxes = [Box(*random_box(rng, size=120)) for _ in range(200)]
+    for box in boxes:
+        grid.insert(box)
+    grid.scroll(-37.5)
+    for box in boxes:
+        box.left -= 37.5
+        box.right -= 37.5
+    grid.remove(boxes[0])
+    player = Box(*random_box(rng))
+    candidates = set(map(id, grid.query(player)))
+    for box in boxes[1:]:
+        if (box.left < player.right and box.right > player.left
+                and box.bottom < player.top and box.top > player.bottom):
+            assert id(box) in candidates
+    assert id(boxes[0]) not in candidates
+    assert len(grid) == len(boxes) - 1
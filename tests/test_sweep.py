@@ -0,0 +1,54 @@
+import random
+
+import arcade
+import pytest
+
+import physics
+
+np = physics.load_numpy()
+needs_numpy = pytest.mark.skipif(np is None, reason="NumPy is not installed")
+
+
+def random_box(rng, size=60):
+    left, bottom = rng.uniform(0, 200), rng.uniform(0, 200)
+    return (left, bottom), (left + rng.uniform(5, size), bottom + rng.uniform(5, size))
+
+
+def corners(lo, hi, shift=(0.0, 0.0)):
+    (left, bottom), (right, top) = lo, hi
+    dx, dy = shift
+    return [(left + dx, bottom + dy), (right + dx, bottom + dy),
+            (right + dx, top + dy), (left + dx, top + dy)]
+
+
+def test_sweep_box_agrees_with_polygon_test():
+    # Boxes are moved back along the step and tested as polygons at many
+    # points; the swept test must report every overlap they find
+    rng = random.Random(2)
+    target_lo, target_hi = (80.0, 80.0), (140.0, 150.0)
+    target = corners(target_lo, target_hi)
+    samples = 64
+    for _ in range(500):
+        lo, hi = random_box(rng)
+        displacement = (rng.uniform(-40, 40), rng.uniform(-40, 40))
+        overlap = physics.sweep_box(lo, hi, displacement, target_lo, target_hi)
+        for sample in range(samples + 1):
+            back = 1.0 - sample / samples
+            shift = (-back * displacement[0], -back * displacement[1])
+            if arcade.are_polygons_intersecting(target, corners(lo, hi, shift)):
+                assert overlap is not None
+                assert overlap[0] - 1e-9 <= sample / samples <= overlap[1] + 1e-9
+
+
+@needs_numpy
+def test_kernel_syncs_active_slots_at_the_offset():
+    kernel = physics.MovementKernel(3)
+    kernel.activate(0, (100.0, 50.0))
+    kernel.activate(2, (300.0, 70.0))
+    kernel.activate(1, (200.0, 60.0))
+    kernel.deactivate(1)
+    sprites = [arcade.Sprite() for _ in range(3)]
+    kernel.sync(sprites, -40.0)
+    assert sprites[0].position == (60.0, 50.0)
+    assert sprites[1].position == (0, 0)
+    assert sprites[2].position == (260.0, 70.0)